@@ -1,7 +1,7 @@
 # agents/finance_agent.py
 from __future__ import annotations
 
-from tools.billing_reader import get_billing_profile
+from tools.billing_reader import BillingProfile, get_billing_profile
 
 
 def compute_arr(deal_amount_usd: int, term_months: int) -> int:
@@ -9,8 +9,19 @@ def compute_arr(deal_amount_usd: int, term_months: int) -> int:
     return int(round((deal_amount_usd / max(term_months, 1)) * 12))
 
 
-def run(customer_name: str, deal_amount_usd: int, term_months: int) -> dict:
-    billing = get_billing_profile(customer_name)
+def run(
+    customer_name: str,
+    deal_amount_usd: int,
+    term_months: int,
+    billing_profile: dict | None = None,
+    prefetched: bool = False,
+) -> dict:
+    # prefetched: a TOOL step already looked the profile up; None then means
+    # "no profile", not "not fetched yet", so billing is not queried again
+    if prefetched:
+        billing = BillingProfile(**billing_profile) if billing_profile is not None else None
+    else:
+        billing = get_billing_profile(customer_name)
 
     arr = compute_arr(deal_amount_usd, term_months)
 
@@ -21,6 +32,7 @@ def run(customer_name: str, deal_amount_usd: int, term_months: int) -> dict:
     return {
         "status": "OK",
         "computed_arr_usd": arr,
-        "billing_profile": billing.model_dump() if billing else None,
+        # reuse the fetched dict so the state holds one copy of the profile
+        "billing_profile": billing_profile if prefetched else (billing.model_dump() if billing else None),
         "risk_flags": risk_flags,
     }
@@ -1,18 +1,16 @@
 # agents/sales_agent.py
 from __future__ import annotations
 
-from tools.crm_reader import get_account_by_customer_name, get_latest_opportunity_for_account
+from tools.crm_reader import get_account_with_latest_opportunity
 
 
 def run(customer_name: str) -> dict:
-    account = get_account_by_customer_name(customer_name)
-    if not account:
+    ctx = get_account_with_latest_opportunity(customer_name)
+    if not ctx:
         return {"status": "NOT_FOUND", "error": f"No account for {customer_name}"}
 
-    opp = get_latest_opportunity_for_account(account.account_id)
-
     return {
         "status": "OK",
-        "account": account.model_dump(),
-        "opportunity": opp.model_dump() if opp else None,
+        "account": ctx.account.model_dump(),
+        "opportunity": ctx.opportunity.model_dump() if ctx.opportunity else None,
     }
@@ -1,19 +1,18 @@
 from __future__ import annotations
 
-import json
-from dataclasses import asdict
+import hashlib
 
 import streamlit as st
-from planner.classify import classify_request, WorkflowType
 
-st. set_page_config(page_title = "AI Automation Platform (MVP)", layout = "centered")
+st.set_page_config(page_title = "AI Automation Platform (MVP)", layout = "centered")
 
 st.title("AI Automation Platform (MVP)")
-st.caption("Deterministic planner + (later Gemini synthesis. Step 1: classify request -> workflow.)")
+st.caption("Deterministic planner + multi-agent execution, with optional Gemini synthesis.")
 
 st.markdown("### Enter a request")
 default_text = "Approve $120k deal for Acme, 12 months, 15% discount, net-30"
-request_text = st.text_area("Request", value = default_text, height  = 120)
+st.session_state.setdefault("request_text", default_text)
+request_text = st.text_area("Request", key = "request_text", height = 120)
 
 use_gemini = st.toggle("Use Gemini for final synthesis (1 call)", value=False)
 
@@ -24,52 +23,95 @@ with col1:
 with col2:
     st.button("Clear", on_click = lambda: st.session_state.update({"request_text": ""}))
 
-if run_btn:
-    from orchestration.state import WorkflowState
-    from orchestration.runner import run_plan
-    from planner.plan_templates import build_plan
 
-    result = classify_request(request_text)
+def _request_key(text: str) -> str:
+    from orchestration.pipeline import normalize_request
 
-    st.markdown("### Classification result")
-    st.write(f"**Workflow:** `{result.workflow.value}`")
-    st.write(f"**Confidence:** `{result.confidence:.2f}`")
+    return hashlib.sha256(normalize_request(text).encode("utf-8")).hexdigest()[:16]
 
-    if result.missing_fields:
-        st.info("Missing fields: " + ", ".join(f"`{f}`" for f in result.missing_fields))
 
-    plan = build_plan(result.workflow)
-    if plan is None:
-        st.error("No plan found for this workflow yet.")
-    else:
-        st.markdown("### Plan steps")
-        for s in plan.steps:
-            st.write(f"- `{s.step_id}` — **{s.owner}.{s.action}**")
-
-        # Build initial state and execute
-        state = WorkflowState(request_text=request_text, entities=result.entities)
-        state = run_plan(state, plan)
-
-        st.markdown("### Execution trace")
-        for e in state.events:
-            st.write(f"`{e.ts}` **{e.level}** [{e.step_id}] — {e.message}")
-            if e.details:
-                st.json(e.details)
-
-        st.markdown("### Decision packet (what we will send to Gemini later)")
-        st.json(state.decision_packet or {})
-        if use_gemini:
-            st.markdown("### Gemini final synthesis")
-        try:
-            from llm.gemini_client import synthesize_decision
-
-            output = synthesize_decision(state.decision_packet)
-            if output.get("_cached"):
-                st.success("Used cached Gemini response ✅")
-            else:
-                st.info("Called Gemini (1 request)")
-
-            st.json(output)
-        except Exception as e:
-            st.error(f"Gemini synthesis failed: {e}")
+# Runs live in session state keyed by request hash, so reruns and widget
+# toggles re-render instead of recomputing. A click reuses the finished run
+# for the same request unless it failed or the data it read has changed.
+MAX_RUNS = 8
+runs = st.session_state.setdefault("runs", {})
 
+if run_btn:
+    # Deferred so a page load that never runs a workflow stays cheap
+    from orchestration.background import BackgroundWorkflow
+
+    key = _request_key(request_text)
+    run = runs.pop(key, None)
+    if run is None or run.stale():
+        run = BackgroundWorkflow(request_text)
+    runs[key] = run  # most recently used last
+    while len(runs) > MAX_RUNS:
+        runs.pop(next(iter(runs)))
+    st.session_state["active_run"] = key
+
+run = runs.get(st.session_state.get("active_run"))
+
+if run is not None:
+    # Live progress: events are pushed to the page as each step logs them
+    with st.status("Running workflow...", expanded = not run.done) as status:
+        shown = 0
+        while True:
+            finished = run.wait(timeout = 0.1)
+            for e in run.events[shown:]:
+                st.write(f"**{e.level}** [{e.step_id}] — {e.message}")
+            shown = len(run.events)
+            if finished:
+                break
+        if run.error:
+            status.update(label = "Workflow failed", state = "error", expanded = True)
+        else:
+            status.update(label = f"Workflow finished ({shown} events)", state = "complete", expanded = False)
+
+    if run.error:
+        st.error(run.error)
+    else:
+        result = run.result
+
+        st.markdown("### Classification result")
+        st.write(f"**Workflow:** `{result.classification.workflow.value}`")
+        st.write(f"**Confidence:** `{result.classification.confidence:.2f}`")
+
+        if result.classification.missing_fields:
+            st.info("Missing fields: " + ", ".join(f"`{f}`" for f in result.classification.missing_fields))
+
+        if result.plan is None:
+            st.error("No plan found for this workflow yet.")
+        else:
+            st.markdown("### Plan steps")
+            for s in result.plan.steps:
+                st.write(f"- `{s.step_id}` — **{s.owner}.{s.action}**")
+
+            with st.expander("Execution trace"):
+                for e in result.state.events:
+                    st.write(f"`{e.ts}` **{e.level}** [{e.step_id}] — {e.message}")
+                    if e.details:
+                        st.json(e.details)
+
+            st.markdown("### Decision packet (what we will send to Gemini later)")
+            st.json(result.state.decision_packet or {})
+
+            st.markdown("### Provisional decision (deterministic)")
+            st.json(result.provisional_decision or {})
+
+            if use_gemini and result.state.decision_packet is not None:
+                st.markdown("### Gemini final synthesis")
+                speculation = run.gemini()
+                with st.spinner("Waiting for Gemini..."):
+                    output = speculation.result()
+
+                if output.get("_synthesis_error"):
+                    st.error(f"Gemini synthesis failed: {output['_synthesis_error']}")
+                else:
+                    if output.get("_cached"):
+                        st.success("Used cached Gemini response ✅")
+                    else:
+                        st.info("Called Gemini (1 request)")
+                    if output.get("_disagreement"):
+                        d = output["_disagreement"]
+                        st.warning(f"Gemini decided `{d['final']}`; provisional was `{d['provisional']}`")
+                    st.json(output)
@@ -0,0 +1,216 @@
+# benchmarks/loadgen.py
+"""
+Record-and-replay load generator for the workflow pipeline.
+
+    # record: run request texts (one per line) and write recordings
+    python -m benchmarks.loadgen record --requests requests.txt --out .bench/recordings.jsonl
+
+    # (or record real traffic: python -m service.http_api --record .bench/recordings.jsonl)
+
+    # replay: open-loop at a fixed QPS with bounded concurrency
+    python -m benchmarks.loadgen replay --input .bench/recordings.jsonl --qps 50 --concurrency 8 \\
+        --count 1000 --synth stub --stub-latency-ms 800
+
+Synthesizers: "none" (deterministic only), "stub" (fake Gemini with fixed
+latency, no quota used) or "gemini" (real calls). Latency is measured from
+each request's scheduled send time, so queueing delay is included when the
+pipeline cannot keep up with the target QPS.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from orchestration.recording import WorkflowRecorder, build_record, read_recordings
+
+
+@dataclass
+class Sample:
+    latency_ms: float
+    service_ms: float
+    ok: bool
+    workflow: Optional[str] = None
+    expected_workflow: Optional[str] = None
+    cache_hit: bool = False
+
+
+@dataclass
+class ReplayReport:
+    sent: int
+    wall_s: float
+    samples: List[Sample] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        done = self.samples
+        lat = sorted(s.latency_ms for s in done)
+        svc = sorted(s.service_ms for s in done)
+        errors = sum(1 for s in done if not s.ok)
+        checked = [s for s in done if s.ok and s.expected_workflow]
+        drift = sum(1 for s in checked if s.workflow != s.expected_workflow)
+        return {
+            "sent": self.sent,
+            "completed": len(done),
+            "wall_s": round(self.wall_s, 3),
+            "throughput_rps": round(len(done) / self.wall_s, 2) if self.wall_s else 0.0,
+            "latency_ms": {"p50": percentile(lat, 50), "p95": percentile(lat, 95), "p99": percentile(lat, 99)},
+            "service_ms": {"p50": percentile(svc, 50), "p95": percentile(svc, 95), "p99": percentile(svc, 99)},
+            "error_rate": round(errors / len(done), 4) if done else 0.0,
+            "cache_hit_rate": round(sum(1 for s in done if s.cache_hit) / len(done), 4) if done else 0.0,
+            "classification_drift": drift,
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    # rounded first so float noise (99.9 * 1000 / 100 = 999.0000000000001)
+    # cannot push the rank one up
+    rank = max(1, math.ceil(round(pct * len(sorted_values) / 100, 9)))
+    return round(sorted_values[min(rank, len(sorted_values)) - 1], 3)
+
+
+def make_stub_synthesizer(latency_ms: float) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Stands in for Gemini: sleeps, then agrees with the deterministic memo."""
+    from llm.deterministic import synthesize_provisional
+
+    def synthesize(decision_packet: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(latency_ms / 1000)
+        memo = synthesize_provisional(decision_packet)
+        memo.pop("_provisional", None)
+        return {"_cached": False, **memo}
+
+    return synthesize
+
+
+def _execute(request_text: str, synth: str, stub_latency_ms: float, coalesce: bool, lean: bool = False):
+    from orchestration.pipeline import run_workflow, run_workflow_shared
+
+    use_gemini = synth != "none"
+    synthesize = make_stub_synthesizer(stub_latency_ms) if synth == "stub" else None
+    if coalesce:
+        return run_workflow_shared(request_text, use_gemini=use_gemini, synthesize=synthesize, lean=lean)
+    return run_workflow(request_text, use_gemini=use_gemini, synthesize=synthesize, lean=lean), False
+
+
+def record(requests_path: Path, out_path: Path, synth: str, stub_latency_ms: float) -> int:
+    recorder = WorkflowRecorder(out_path)
+    n = 0
+    for line in requests_path.read_text(encoding="utf-8").splitlines():
+        text = line.strip()
+        if not text:
+            continue
+        started = time.perf_counter()
+        try:
+            result, shared = _execute(text, synth, stub_latency_ms, coalesce=False)
+            error = None
+        except Exception as e:
+            result, shared, error = None, False, f"{type(e).__name__}: {e}"
+        latency_ms = (time.perf_counter() - started) * 1000
+        recorder.write(build_record(text, synth != "none", latency_ms, result=result, shared=shared, error=error))
+        n += 1
+    return n
+
+
+def replay(
+    recordings: List[Dict[str, Any]],
+    qps: float,
+    concurrency: int,
+    count: int,
+    synth: str = "none",
+    stub_latency_ms: float = 800.0,
+    coalesce: bool = False,
+    lean: bool = False,
+) -> ReplayReport:
+    if not recordings:
+        raise ValueError("No recordings to replay")
+
+    samples: List[Sample] = []
+    lock = threading.Lock()
+
+    def one(rec: Dict[str, Any], scheduled: float) -> None:
+        started = time.perf_counter()
+        sample = Sample(latency_ms=0.0, service_ms=0.0, ok=True, expected_workflow=rec.get("workflow"))
+        try:
+            result, shared = _execute(rec["request_text"], synth, stub_latency_ms, coalesce, lean)
+            sample.workflow = result.classification.workflow.value
+            decision = result.decision or {}
+            sample.cache_hit = shared or bool(decision.get("_cached")) or bool(decision.get("_coalesced"))
+        except Exception:
+            sample.ok = False
+        done = time.perf_counter()
+        sample.service_ms = (done - started) * 1000
+        sample.latency_ms = (done - scheduled) * 1000
+        with lock:
+            samples.append(sample)
+
+    interval = 1.0 / qps
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadgen") as pool:
+        for i in range(count):
+            scheduled = t0 + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, recordings[i % len(recordings)], scheduled)
+    wall = time.perf_counter() - t0
+
+    return ReplayReport(sent=count, wall_s=wall, samples=samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record-and-replay load generator")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    def add_synth_args(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--synth", choices=["none", "stub", "gemini"], default="none")
+        p.add_argument("--stub-latency-ms", type=float, default=800.0)
+
+    p_rec = sub.add_parser("record", help="run request texts and write recordings")
+    p_rec.add_argument("--requests", type=Path, required=True, help="text file, one request per line")
+    p_rec.add_argument("--out", type=Path, required=True)
+    add_synth_args(p_rec)
+
+    p_rep = sub.add_parser("replay", help="replay recordings at a target QPS")
+    p_rep.add_argument("--input", type=Path, required=True)
+    p_rep.add_argument("--qps", type=float, default=10.0)
+    p_rep.add_argument("--concurrency", type=int, default=8)
+    p_rep.add_argument("--count", type=int, default=None, help="requests to send (default: one pass)")
+    p_rep.add_argument("--coalesce", action="store_true", help="use single-flight coalescing like the service")
+    p_rep.add_argument("--lean", action="store_true", help="run workflows with the memory-lean state")
+    p_rep.add_argument("--json", type=Path, help="also write the report as JSON")
+    add_synth_args(p_rep)
+
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        n = record(args.requests, args.out, args.synth, args.stub_latency_ms)
+        print(f"Recorded {n} requests to {args.out}")
+        return
+
+    recordings = list(read_recordings(args.input))
+    report = replay(
+        recordings,
+        qps=args.qps,
+        concurrency=args.concurrency,
+        count=args.count or len(recordings),
+        synth=args.synth,
+        stub_latency_ms=args.stub_latency_ms,
+        coalesce=args.coalesce,
+        lean=args.lean,
+    ).to_dict()
+    print(json.dumps(report, indent=2))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
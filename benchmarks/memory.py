@@ -0,0 +1,93 @@
+# benchmarks/memory.py
+"""
+Memory footprint of a batch that keeps every WorkflowResult alive.
+
+    python -m benchmarks.memory --count 10000                 # default state
+    python -m benchmarks.memory --count 10000 --lean          # lean state
+    python -m benchmarks.memory --requests requests.txt --count 100000 --lean --json .bench/mem.json
+
+Reports traced heap growth for the whole batch, bytes per workflow, and the
+average per-section breakdown from orchestration.lean.memory_report.
+Requests are cycled from --requests (one per line) or a built-in sample.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+from orchestration.lean import memory_report
+
+SAMPLE_REQUESTS = [
+    "Approve $120k deal for Acme, 12 months, 15% discount, net-30",
+    "Approve $48k deal for Acme, 12 months, 25% discount, net-45",
+    "Approve $300k deal for Acme, 12 months, 10% discount",
+]
+
+
+def run_batch(requests: List[str], count: int, lean: bool) -> Dict[str, Any]:
+    from orchestration.pipeline import run_workflow
+
+    # warm imports and the store outside the measurement
+    run_workflow(requests[0], lean=lean)
+    gc.collect()
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    results = []
+    errors = 0
+    for i in range(count):
+        try:
+            results.append(run_workflow(requests[i % len(requests)], lean=lean))
+        except Exception:
+            errors += 1
+    wall = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    reports = [memory_report(r.state) for r in results]
+    sections: Dict[str, float] = {}
+    for rep in reports:
+        for name, size in rep["bytes"].items():
+            sections[name] = sections.get(name, 0) + size
+    held = current - base
+    return {
+        "lean": lean,
+        "count": count,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "held_mb": round(held / 1e6, 2),
+        "peak_mb": round((peak - base) / 1e6, 2),
+        "bytes_per_workflow": int(held / len(results)) if results else 0,
+        "avg_section_bytes": {k: int(v / len(reports)) for k, v in sections.items()} if reports else {},
+        "avg_spilled_events": round(sum(r["events"]["spilled"] for r in reports) / len(reports), 2) if reports else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch memory footprint")
+    parser.add_argument("--requests", type=Path, help="text file, one request per line")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--lean", action="store_true", help="run with the memory-lean state")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    requests = SAMPLE_REQUESTS
+    if args.requests:
+        requests = [line.strip() for line in args.requests.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    report = run_batch(requests, args.count, args.lean)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
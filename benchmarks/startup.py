@@ -0,0 +1,171 @@
+# benchmarks/startup.py
+"""
+Startup / import-time profiling for worker cold start.
+
+    # per-module import cost of an entry point (python -X importtime, aggregated)
+    python -m benchmarks.startup report --module service.http_api --top 25
+
+    # cold-start benchmark: fresh interpreters, median wall time per scenario
+    python -m benchmarks.startup bench --runs 5 --save .bench/startup.json
+    python -m benchmarks.startup bench --runs 5 --compare .bench/startup.json --max-regression 0.2
+
+Every measurement runs in a fresh subprocess, so nothing is already imported.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_REQUEST = "Approve $120k deal for Acme, 12 months, 15% discount, net-30"
+
+# name -> code run in a fresh interpreter
+SCENARIOS: Dict[str, str] = {
+    "import_pipeline": "import orchestration.pipeline",
+    "import_service": "import service.http_api",
+    "unknown_request": (
+        "from orchestration.pipeline import run_workflow; "
+        "run_workflow('hello, can you help me?')"
+    ),
+    "first_deal_approval": (
+        "from orchestration.pipeline import run_workflow; "
+        f"run_workflow({DEFAULT_REQUEST!r})"
+    ),
+}
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def _run_python(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, check=False
+    )
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Parses `python -X importtime` output ("import time: self | cumulative | name")."""
+    records: List[ImportRecord] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        records.append(
+            ImportRecord(
+                module=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cum_us),
+                depth=(len(name) - len(name.lstrip())) // 2,
+            )
+        )
+    return records
+
+
+def import_report(module: str) -> List[ImportRecord]:
+    proc = _run_python(["-X", "importtime", "-c", f"import {module}"])
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    return parse_importtime(proc.stderr)
+
+
+def print_report(module: str, top: int) -> None:
+    records = import_report(module)
+    total_us = sum(r.self_us for r in records)
+
+    by_package: Dict[str, int] = {}
+    for r in records:
+        pkg = r.module.strip().split(".")[0]
+        by_package[pkg] = by_package.get(pkg, 0) + r.self_us
+
+    print(f"Import cost of `{module}`: {total_us / 1000:.1f} ms across {len(records)} modules\n")
+    print(f"Top {top} packages by self time:")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {us / 1000:9.1f} ms  {pkg}")
+
+    print(f"\nTop {top} modules by cumulative time:")
+    for r in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f"  {r.cumulative_us / 1000:9.1f} ms  (self {r.self_us / 1000:7.1f} ms)  {r.module}")
+
+
+def bench(runs: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, code in SCENARIOS.items():
+        timings: List[float] = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = _run_python(["-c", code])
+            elapsed = (time.perf_counter() - start) * 1000
+            if proc.returncode != 0:
+                raise RuntimeError(f"Scenario {name} failed:\n{proc.stderr}")
+            timings.append(elapsed)
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 1),
+            "min_ms": round(min(timings), 1),
+            "max_ms": round(max(timings), 1),
+        }
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], max_regression: float) -> bool:
+    ok = True
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = (stats["median_ms"] - base["median_ms"]) / base["median_ms"]
+        flag = "REGRESSION" if change > max_regression else "ok"
+        ok = ok and flag == "ok"
+        print(f"  {name:24s} {base['median_ms']:8.1f} -> {stats['median_ms']:8.1f} ms  ({change:+.0%})  {flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup / import-time profiling")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_report = sub.add_parser("report", help="per-module import cost of an entry point")
+    p_report.add_argument("--module", default="orchestration.pipeline")
+    p_report.add_argument("--top", type=int, default=20)
+
+    p_bench = sub.add_parser("bench", help="cold-start wall time per scenario")
+    p_bench.add_argument("--runs", type=int, default=5)
+    p_bench.add_argument("--save", type=Path, help="write results as JSON (e.g. a new baseline)")
+    p_bench.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    p_bench.add_argument("--max-regression", type=float, default=0.20, help="allowed median slowdown (0.2 = 20%%)")
+
+    args = parser.parse_args()
+
+    if args.cmd == "report":
+        print_report(args.module, args.top)
+        return
+
+    results = bench(args.runs)
+    print(f"Cold start, median of {args.runs} fresh interpreters:")
+    for name, stats in results.items():
+        print(f"  {name:24s} {stats['median_ms']:8.1f} ms  (min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f})")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        if not compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,15 @@ from __future__ import annotations
 
 import hashlib
 import json
+import threading
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 CACHE_PATH = Path(".cache/gemini_cache.json")
 
+# serializes read-modify-write of the cache file across worker threads
+_cache_lock = threading.Lock()
+
 
 def _stable_hash(obj: Any) -> str:
     payload = json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
@@ -36,7 +40,8 @@ def get_cached_response(cache_key_obj: Any) -> Optional[Dict[str, Any]]:
 
 
 def set_cached_response(cache_key_obj: Any, response: Dict[str, Any]) -> None:
-    cache = load_cache()
     key = _stable_hash(cache_key_obj)
-    cache[key] = response
-    save_cache(cache)
+    with _cache_lock:
+        cache = load_cache()
+        cache[key] = response
+        save_cache(cache)
@@ -0,0 +1,147 @@
+# llm/deterministic.py
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Required entities per workflow; mirrors planner.classify missing-field rules
+_REQUIRED_ENTITIES = {
+    "DEAL_APPROVAL": ["customer_name", "deal_amount_usd", "term_months"],
+}
+
+LOW_ENGAGEMENT_RATIO = 0.5
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get(packet: Dict[str, Any], dotted_key: str) -> Any:
+    cur: Any = packet
+    for p in dotted_key.split("."):
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(p)
+    return cur
+
+
+def synthesize_provisional(decision_packet: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rule-based decision memo built only from the decision packet.
+    Same schema as the Gemini memo, so the UI/API can show it right away
+    while the LLM call is still running. No I/O, runs in microseconds.
+    """
+    workflow = decision_packet.get("workflow", "")
+    rationale: List[Dict[str, str]] = []
+    risks: List[str] = []
+    follow_ups: List[str] = []
+
+    missing = [
+        f"entities.{k}" for k in _REQUIRED_ENTITIES.get(workflow, []) if not _get(decision_packet, f"entities.{k}")
+    ]
+    if _get(decision_packet, "facts.sales.status") not in (None, "OK"):
+        missing.append("facts.sales.account")
+        rationale.append({"claim": "No CRM account found for the customer", "evidence_key": "facts.sales.status"})
+
+    risks.extend(_get(decision_packet, "facts.finance.risk_flags") or [])
+    usage = _get(decision_packet, "facts.data.usage_summary")
+    if usage is None:
+        risks.append("NO_USAGE_DATA")
+    elif usage.get("avg_weekly_active_ratio_3mo", 1.0) < LOW_ENGAGEMENT_RATIO:
+        risks.append("LOW_ENGAGEMENT")
+        rationale.append(
+            {"claim": "Weekly active ratio is below 50%", "evidence_key": "facts.data.usage_summary.avg_weekly_active_ratio_3mo"}
+        )
+
+    policy = _get(decision_packet, "facts.compliance.policy") or {}
+    violations = policy.get("violations") or []
+
+    if missing:
+        decision = "NEEDS_INFO"
+        summary = "Required information is missing; cannot decide yet."
+        follow_ups.append("Provide the missing items and resubmit.")
+    elif violations:
+        # policy routes violations to a director rather than rejecting them
+        decision = "NEEDS_INFO"
+        summary = f"Deal violates policy ({', '.join(violations)}) and needs director approval."
+        missing.append("director_approval")
+        rationale.append({"claim": "Policy violations present", "evidence_key": "facts.compliance.policy.violations"})
+        follow_ups.append("Route to a director for approval, or revise the deal terms to fit policy.")
+    elif policy.get("requires_director_approval"):
+        decision = "NEEDS_INFO"
+        summary = "Deal is within policy but above the auto-approve threshold."
+        missing.append("director_approval")
+        rationale.append(
+            {"claim": "Director approval is required", "evidence_key": "facts.compliance.policy.requires_director_approval"}
+        )
+        follow_ups.append("Route to a director for approval.")
+    else:
+        decision = "APPROVE"
+        summary = "Deal is within policy and below the auto-approve threshold."
+        rationale.append({"claim": "No policy violations", "evidence_key": "facts.compliance.policy.violations"})
+        rationale.append({"claim": "ARR is within auto-approve limits", "evidence_key": "facts.finance.computed_arr_usd"})
+
+    return {
+        "decision": decision,
+        "summary": summary,
+        "rationale": rationale,
+        "risks": risks,
+        "follow_ups": follow_ups,
+        "audit": {
+            "trace_id": decision_packet.get("trace_id", ""),
+            "workflow": workflow,
+            "model": "deterministic",
+            "prompt_version": "n/a",
+        },
+        "missing_items": missing,
+        "_provisional": True,
+    }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini-synthesis")
+        return _executor
+
+
+class SpeculativeDecision:
+    """
+    Provisional memo now, Gemini memo later.
+
+    `provisional` is available immediately; the Gemini call runs on a
+    background thread. `result()` waits for it and returns the final memo,
+    annotated with `_disagreement` when the two decisions differ. If the
+    call fails, the provisional memo is returned with `_synthesis_error`.
+    """
+
+    def __init__(
+        self,
+        decision_packet: Dict[str, Any],
+        provisional: Optional[Dict[str, Any]] = None,
+        synthesize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        if synthesize is None:
+            from llm.gemini_client import synthesize_decision as synthesize
+        self.provisional = provisional or synthesize_provisional(decision_packet)
+        self._future: Future = _get_executor().submit(synthesize, decision_packet)
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            final = self._future.result(timeout=timeout)
+        except Exception as e:
+            if not self._future.done():
+                raise  # timed out while still running; caller decides whether to keep waiting
+            return {**self.provisional, "_synthesis_error": f"{type(e).__name__}: {e}"}
+
+        disagreement = self.disagreement(final)
+        return {**final, "_disagreement": disagreement} if disagreement else final
+
+    def disagreement(self, final: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        if final.get("decision") == self.provisional["decision"]:
+            return None
+        return {"provisional": self.provisional["decision"], "final": str(final.get("decision"))}
@@ -3,67 +3,92 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from llm.cache import get_cached_response, set_cached_response
+from llm.cache import _stable_hash, get_cached_response, set_cached_response
+from llm.packet import DEFAULT_TOKEN_BUDGET, compact_packet, dumps_compact, estimate_tokens
+from orchestration.singleflight import SingleFlight
 
 
-PROMPT_VERSION = "v1"  # bump this whenever you change the prompt/schema
+PROMPT_VERSION = "v2"  # bump this whenever you change the prompt/schema
 
+# identical packets already waiting on Gemini share that one call
+_llm_flights = SingleFlight("gemini")
 
-def _build_prompt(decision_packet: Dict[str, Any]) -> str:
+# Static part of the prompt. Kept short: every token here is paid on every
+# call. The audit block is filled in locally, so the model never echoes it.
+_PROMPT_HEADER = """
+You write decision memos for internal deal approvals.
+Input: DECISION_PACKET (JSON): extracted entities and facts from CRM, billing, analytics and policy.
+Rules:
+1) Use ONLY values present in DECISION_PACKET; never invent data.
+2) Output ONE valid JSON object. No markdown, no backticks.
+3) Every claim cites an evidence_key: the dotted path of a DECISION_PACKET field.
+4) If required info is missing, decision="NEEDS_INFO" and list missing_items.
+Schema:
+{"decision":"APPROVE"|"REJECT"|"NEEDS_INFO","summary":"string","rationale":[{"claim":"string","evidence_key":"string"}],"risks":["string"],"follow_ups":["string"],"missing_items":["string"]}
+DECISION_PACKET:
+""".strip()
+
+
+def _build_prompt(compact_packet: Dict[str, Any]) -> str:
     """
     We instruct Gemini to ONLY output JSON, no markdown.
     We also constrain it to cite evidence keys from the packet.
+    `compact_packet` is the output of llm.packet.compact_packet.
     """
-    return f"""
-You are an internal automation assistant for a software company.
-You will be given a JSON object called DECISION_PACKET containing:
-- request_text
-- entities
-- facts from internal systems (crm, billing, analytics)
-- policy results
-Your job: produce a decision memo in STRICT JSON ONLY.
+    return f"{_PROMPT_HEADER}\n{dumps_compact(compact_packet)}"
 
-Rules:
-1) Do not invent data. Use ONLY values present in DECISION_PACKET.
-2) Output MUST be valid JSON. No markdown. No backticks.
-3) Every claim must reference an evidence_key that exists in DECISION_PACKET.
-4) If required info is missing, set decision="NEEDS_INFO" and list missing_items.
-
-Return JSON with this exact schema:
-{{
-  "decision": "APPROVE" | "REJECT" | "NEEDS_INFO",
-  "summary": "string",
-  "rationale": [
-    {{"claim": "string", "evidence_key": "string"}}
-  ],
-  "risks": ["string"],
-  "follow_ups": ["string"],
-  "audit": {{
-    "trace_id": "string",
-    "workflow": "DEAL_APPROVAL",
-    "model": "gemini-2.5-flash",
-    "prompt_version": "{PROMPT_VERSION}"
-  }},
-  "missing_items": ["string"]
-}}
 
-DECISION_PACKET:
-{json.dumps(decision_packet, ensure_ascii=False)}
-""".strip()
+def _token_budget(token_budget: Optional[int]) -> int:
+    if token_budget is not None:
+        return token_budget
+    return int(os.getenv("GEMINI_PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
 
 
-def synthesize_decision(decision_packet: Dict[str, Any], model: str = "gemini-2.5-flash") -> Dict[str, Any]:
+def _with_audit(response: Dict[str, Any], decision_packet: Dict[str, Any], model: str) -> Dict[str, Any]:
+    audit = {
+        "trace_id": decision_packet.get("trace_id", ""),
+        "workflow": decision_packet.get("workflow", ""),
+        "model": model,
+        "prompt_version": PROMPT_VERSION,
+    }
+    return {**response, "audit": audit}
+
+
+def synthesize_decision(
+    decision_packet: Dict[str, Any],
+    model: str = "gemini-2.5-flash",
+    token_budget: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     Calls Gemini once and returns the parsed JSON response.
-    Uses on-disk cache to avoid repeated calls.
+
+    The packet is compacted (whitelisted fields, no nulls, trimmed to
+    `token_budget` / GEMINI_PROMPT_TOKEN_BUDGET) before it is sent. The
+    compact packet has no trace_id, so the on-disk cache and in-flight
+    coalescing both hit across runs of the same deal.
     """
-    cache_key = {"prompt_version": PROMPT_VERSION, "model": model, "decision_packet": decision_packet}
+    budget = _token_budget(token_budget)
+    compact, trimmed = compact_packet(
+        decision_packet, token_budget=budget, prompt_overhead_tokens=estimate_tokens(_PROMPT_HEADER)
+    )
+    prompt = _build_prompt(compact)
+    meta = {"_prompt_tokens": estimate_tokens(prompt), "_trimmed_fields": trimmed}
+
+    cache_key = {"prompt_version": PROMPT_VERSION, "model": model, "decision_packet": compact}
     cached = get_cached_response(cache_key)
     if cached is not None:
-        return {"_cached": True, **cached}
+        return {"_cached": True, **meta, **_with_audit(cached, decision_packet, model)}
+
+    out, shared = _llm_flights.do(_stable_hash(cache_key), lambda: _call_gemini(prompt, model, cache_key))
+    result = {"_cached": False, **meta, **_with_audit(out, decision_packet, model)}
+    if shared:
+        result["_coalesced"] = True
+    return result
+
 
+def _call_gemini(prompt: str, model: str, cache_key: Dict[str, Any]) -> Dict[str, Any]:
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         # Fail fast with a clear error
@@ -73,7 +98,6 @@ def synthesize_decision(decision_packet: Dict[str, Any], model: str = "gemini-2.
     from google import genai  # type: ignore
 
     client = genai.Client(api_key=api_key)
-    prompt = _build_prompt(decision_packet)
 
     resp = client.models.generate_content(
         model=model,
@@ -93,16 +117,10 @@ def synthesize_decision(decision_packet: Dict[str, Any], model: str = "gemini-2.
             "rationale": [{"claim": "JSON parsing failed", "evidence_key": "N/A"}],
             "risks": ["MODEL_OUTPUT_NOT_JSON"],
             "follow_ups": ["Adjust prompt or enforce JSON mode if available in your SDK."],
-            "audit": {
-                "trace_id": decision_packet.get("trace_id", ""),
-                "workflow": "DEAL_APPROVAL",
-                "model": model,
-                "prompt_version": PROMPT_VERSION,
-            },
             "missing_items": [],
             "_raw_model_output": text,
             "_json_error": str(e),
         }
 
     set_cached_response(cache_key, parsed)
-    return {"_cached": False, **parsed}
+    return parsed
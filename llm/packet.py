@@ -0,0 +1,152 @@
+# llm/packet.py
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from planner.classify import WorkflowType
+
+logger = logging.getLogger(__name__)
+
+
+class PromptBudgetExceeded(ValueError):
+    """The required packet fields alone do not fit in the token budget."""
+    pass
+
+
+@dataclass(frozen=True)
+class PacketField:
+    path: str                # dotted path into the decision packet
+    required: bool = False   # never trimmed to fit the budget
+
+
+# Per-workflow whitelist of packet fields the memo may cite, in priority
+# order. When the prompt is over budget, optional fields are trimmed from
+# the end of the list first.
+PACKET_FIELDS: Dict[WorkflowType, List[PacketField]] = {
+    WorkflowType.DEAL_APPROVAL: [
+        PacketField("workflow", required=True),
+        PacketField("entities.customer_name", required=True),
+        PacketField("entities.deal_amount_usd", required=True),
+        PacketField("entities.term_months", required=True),
+        PacketField("entities.discount_pct", required=True),
+        PacketField("facts.sales.status", required=True),
+        PacketField("facts.finance.computed_arr_usd", required=True),
+        PacketField("facts.compliance.policy.requires_director_approval", required=True),
+        PacketField("facts.compliance.policy.violations", required=True),
+        PacketField("facts.finance.risk_flags"),
+        PacketField("facts.compliance.policy.policy_version"),
+        PacketField("facts.compliance.policy.discount_cap_pct"),
+        PacketField("facts.compliance.policy.max_auto_approve_arr_usd"),
+        PacketField("facts.data.usage_summary.avg_active_seats_3mo"),
+        PacketField("facts.data.usage_summary.avg_weekly_active_ratio_3mo"),
+        PacketField("facts.finance.billing_profile.on_time_payment_rate"),
+        PacketField("facts.finance.billing_profile.status"),
+        PacketField("facts.finance.billing_profile.mrr_usd"),
+        PacketField("entities.payment_terms"),
+        PacketField("facts.sales.error"),
+        PacketField("facts.sales.resolution.confidence"),
+        PacketField("facts.sales.resolution.candidates"),
+        PacketField("facts.sales.opportunity.stage"),
+        PacketField("facts.sales.opportunity.requested_discount_pct"),
+        PacketField("facts.sales.account.segment"),
+        PacketField("facts.sales.account.region"),
+    ],
+}
+
+DEFAULT_TOKEN_BUDGET = 2_000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap prompt-size estimate (~4 characters per token for English/JSON).
+    Good enough for budgeting without calling the tokenizer endpoint.
+    """
+    return (len(text) + 3) // 4
+
+
+def dumps_compact(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _lookup(packet: Dict[str, Any], path: str) -> Any:
+    cur: Any = packet
+    for p in path.split("."):
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(p)
+    return cur
+
+
+def _insert(out: Dict[str, Any], path: str, value: Any) -> None:
+    parts = path.split(".")
+    cur = out
+    for p in parts[:-1]:
+        cur = cur.setdefault(p, {})
+    cur[parts[-1]] = value
+
+
+def _drop_nulls(obj: Any) -> Any:
+    # also rounds floats: 0.7399999999999999 costs more tokens than 0.74
+    if isinstance(obj, dict):
+        return {k: _drop_nulls(v) for k, v in obj.items() if v is not None and v != {} and v != ""}
+    if isinstance(obj, list):
+        return [_drop_nulls(v) for v in obj if v is not None]
+    if isinstance(obj, float):
+        return round(obj, 4)
+    return obj
+
+
+def _select(packet: Dict[str, Any], fields: List[PacketField]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for f in fields:
+        value = _lookup(packet, f.path)
+        if value is not None:
+            _insert(out, f.path, _drop_nulls(value))
+    return out
+
+
+def compact_packet(
+    decision_packet: Dict[str, Any],
+    token_budget: Optional[int] = None,
+    prompt_overhead_tokens: int = 0,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Reduce a decision packet to what the memo may cite.
+
+    - keeps only the whitelisted fields for the packet's workflow
+      (trace_id and the raw request_text are never sent)
+    - drops null/empty values
+    - trims optional fields, lowest priority first, until the prompt fits
+      `token_budget` (including `prompt_overhead_tokens` of static text)
+
+    Returns (compact_packet, trimmed_paths).
+    Raises PromptBudgetExceeded if the required fields alone do not fit.
+    """
+    try:
+        fields = PACKET_FIELDS[WorkflowType(decision_packet.get("workflow"))]
+    except (KeyError, ValueError):
+        # no whitelist for this workflow: send everything but the bulky/unused keys
+        rest = {k: v for k, v in decision_packet.items() if k not in ("trace_id", "request_text", "generated_by")}
+        return _drop_nulls(rest), []
+
+    kept = [f for f in fields if _lookup(decision_packet, f.path) is not None]
+    compact = _select(decision_packet, kept)
+    trimmed: List[str] = []
+
+    if token_budget is not None:
+        while estimate_tokens(dumps_compact(compact)) + prompt_overhead_tokens > token_budget:
+            optional = [i for i, f in enumerate(kept) if not f.required]
+            if not optional:
+                raise PromptBudgetExceeded(
+                    f"Required packet fields need ~{estimate_tokens(dumps_compact(compact))} tokens "
+                    f"(+{prompt_overhead_tokens} prompt) but the budget is {token_budget}"
+                )
+            trimmed.append(kept.pop(optional[-1]).path)
+            compact = _select(decision_packet, kept)
+
+    if trimmed:
+        logger.info("Trimmed %d packet field(s) to fit %d-token budget: %s", len(trimmed), token_budget, trimmed)
+    return compact, trimmed
@@ -0,0 +1,78 @@
+# orchestration/background.py
+from __future__ import annotations
+
+import threading
+from typing import Any, List, Optional
+
+from orchestration.state import Event
+
+
+class BackgroundWorkflow:
+    """
+    Runs one workflow on a background thread and buffers its events, so a UI
+    can render progress while it runs and re-render the finished result on
+    later reruns without executing anything again.
+
+    Gemini synthesis is separate (`gemini()`): it starts on first request
+    and is reused after that, so toggling it never re-runs the plan.
+    """
+
+    def __init__(self, request_text: str):
+        self.request_text = request_text
+        self.events: List[Event] = []
+        self.result: Optional[Any] = None       # orchestration.pipeline.WorkflowResult
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._speculation: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ui-workflow", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        from orchestration.pipeline import run_workflow
+
+        try:
+            # list.append is atomic, so readers can poll `events` while we write
+            self.result = run_workflow(self.request_text, use_gemini=False, listeners=[self.events.append])
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def stale(self) -> bool:
+        """
+        True once a finished run should not be shown again for a new click:
+        it failed, or an ingest has changed the data it read.
+        """
+        if not self.done:
+            return False
+        if self.error or self.result is None:
+            return True
+        if self.result.data_version is None:
+            return False
+        from tools.duckdb_store import data_version
+
+        return data_version() != self.result.data_version
+
+    def gemini(self) -> Optional[Any]:
+        """
+        The (shared) SpeculativeDecision for this run's packet, started on
+        first call. None until the workflow has produced a packet.
+        """
+        if not self.done or self.result is None or self.result.state.decision_packet is None:
+            return None
+        with self._lock:
+            if self._speculation is None:
+                from llm.deterministic import SpeculativeDecision
+
+                self._speculation = SpeculativeDecision(
+                    self.result.state.decision_packet, provisional=self.result.provisional_decision
+                )
+            return self._speculation
@@ -0,0 +1,251 @@
+# orchestration/lean.py
+"""
+Memory-lean workflow state, for batches that hold thousands of results:
+
+- EventLog: keeps the newest events in memory and spills older ones to
+  shared, rotating temp files (read back on demand, freed on release)
+- trim_facts: keeps only the given fact paths (the packet whitelist)
+- memory_report: approximate per-workflow footprint
+
+Enabled with run_workflow(..., lean=True).
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import weakref
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from orchestration.state import Event, WorkflowState
+
+DEFAULT_SPILL_THRESHOLD = 16
+SPILL_FILE_BYTES = 64 * 1024 * 1024
+
+
+class _SpillFile:
+    """
+    One append-only temp file shared by every EventLog, so a 100k-workflow
+    batch holds a handful of file descriptors, not 100k. Once it reaches
+    SPILL_FILE_BYTES a new file takes over; a full file is closed (and its
+    space freed) when the last of its segments is released.
+    """
+
+    def __init__(self) -> None:
+        self._f = tempfile.TemporaryFile(prefix="workflow-events-")
+        self._lock = threading.Lock()
+        self.size = 0
+        self.live = 0  # bytes in segments not yet released
+        self.sealed = False
+
+    def write(self, data: bytes) -> int:
+        with self._lock:
+            offset = self.size
+            self._f.seek(offset)
+            self._f.write(data)
+            self.size += len(data)
+            self.live += len(data)
+            return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        with self._lock:
+            self._f.flush()
+            self._f.seek(offset)
+            return self._f.read(length)
+
+    def seal(self) -> None:
+        with self._lock:
+            self.sealed = True
+            self._close_if_unused()
+
+    def release(self, length: int) -> None:
+        with self._lock:
+            self.live -= length
+            self._close_if_unused()
+
+    def _close_if_unused(self) -> None:
+        # caller holds _lock
+        if self.sealed and self.live <= 0 and not self._f.closed:
+            self._f.close()
+
+
+_spill_file: Optional[_SpillFile] = None
+_spill_lock = threading.Lock()
+
+
+def _spill_write(data: bytes) -> Tuple[_SpillFile, int]:
+    global _spill_file
+    with _spill_lock:
+        if _spill_file is not None and _spill_file.size >= SPILL_FILE_BYTES:
+            _spill_file.seal()
+            _spill_file = None
+        if _spill_file is None:
+            _spill_file = _SpillFile()
+        return _spill_file, _spill_file.write(data)
+
+
+def _release_segments(segments: List[Tuple[_SpillFile, int, int, int]]) -> None:
+    for spill, _, length, _ in segments:
+        spill.release(length)
+    segments.clear()
+
+
+class EventLog:
+    """
+    List-like event trace. Once more than `spill_threshold` events are held,
+    all but the newest half are written to the spill file as JSON lines and
+    dropped from memory. Iteration, len() and indexing/slicing cover the
+    whole trace; spilled events come back as new Event objects.
+
+    Spilled segments are released when the log is garbage-collected, or
+    right away with release().
+    """
+
+    def __init__(self, spill_threshold: int = DEFAULT_SPILL_THRESHOLD):
+        self.spill_threshold = max(2, spill_threshold)
+        self._tail: List[Event] = []
+        self._segments: List[Tuple[_SpillFile, int, int, int]] = []  # (file, offset, length, count)
+        self._spilled = 0
+        self._finalizer = weakref.finalize(self, _release_segments, self._segments)
+
+    def append(self, event: Event) -> None:
+        self._tail.append(event)
+        if len(self._tail) > self.spill_threshold:
+            self._spill(len(self._tail) - self.spill_threshold // 2)
+
+    def extend(self, events: Iterable[Event]) -> None:
+        for e in events:
+            self.append(e)
+
+    def flush(self) -> None:
+        """Spills every in-memory event (e.g. once the workflow has finished)."""
+        if self._tail:
+            self._spill(len(self._tail))
+
+    def _spill(self, n: int) -> None:
+        head, self._tail = self._tail[:n], self._tail[n:]
+        data = "".join(json.dumps(asdict(e), default=str) + "\n" for e in head).encode("utf-8")
+        spill, offset = _spill_write(data)
+        self._segments.append((spill, offset, len(data), len(head)))
+        self._spilled += len(head)
+
+    def release(self) -> None:
+        """Drops the whole trace and frees its spilled segments."""
+        _release_segments(self._segments)
+        self._tail = []
+        self._spilled = 0
+
+    def _read_spilled(self) -> Iterator[Event]:
+        for spill, offset, length, _ in list(self._segments):
+            for line in spill.read(offset, length).decode("utf-8").splitlines():
+                yield Event(**json.loads(line))
+
+    @property
+    def spilled(self) -> int:
+        return self._spilled
+
+    @property
+    def spilled_bytes(self) -> int:
+        return sum(length for _, _, length, _ in self._segments)
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._tail)
+
+    def __iter__(self) -> Iterator[Event]:
+        yield from self._read_spilled()
+        yield from list(self._tail)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Event, List[Event]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if start >= self._spilled and step == 1:
+                return self._tail[start - self._spilled : stop - self._spilled]
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index >= self._spilled:
+            return self._tail[index - self._spilled]
+        return list(self._read_spilled())[index]
+
+
+def _interned(value: Any) -> Any:
+    # ids, names and statuses repeat across a batch; store one copy of each
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: _interned(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_interned(v) for v in value]
+    return value
+
+
+def trim_facts(facts: Dict[str, Any], paths: Iterable[str]) -> Dict[str, Any]:
+    """
+    New facts dict holding only the given dotted paths ("facts.finance.risk_flags",
+    "facts.sales", ...), with string keys and values interned. Everything
+    else (agent status flags, intermediate outputs) is dropped.
+    """
+    out: Dict[str, Any] = {}
+    for path in paths:
+        parts = [sys.intern(p) for p in path.split(".")]
+        if parts[0] != "facts" or len(parts) < 2:
+            continue
+        src: Any = facts
+        for p in parts[1:]:
+            src = src.get(p) if isinstance(src, dict) else None
+            if src is None:
+                break
+        if src is None:
+            continue
+        dst = out
+        for p in parts[1:-1]:
+            dst = dst.setdefault(p, {})
+        dst[parts[-1]] = _interned(src)
+    return out
+
+
+def _deep_size(obj: Any, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_size(getattr(obj, s), seen) for s in obj.__slots__ if hasattr(obj, s))
+    elif hasattr(obj, "__dict__"):
+        size += _deep_size(vars(obj), seen)
+    return size
+
+
+def memory_report(state: WorkflowState) -> Dict[str, Any]:
+    """
+    Approximate bytes held by one workflow's state, per section. Objects
+    shared between sections (the packet references `facts` and `entities`)
+    are counted once, under the first section that holds them.
+    """
+    seen: set = set()
+    events = state.events
+    in_memory = events._tail if isinstance(events, EventLog) else events
+    sections = {
+        "entities": _deep_size(state.entities, seen),
+        "facts": _deep_size(state.facts, seen),
+        "decision_packet": _deep_size(state.decision_packet, seen),
+        "events": _deep_size(in_memory, seen),
+        "request_text": _deep_size(state.request_text, seen),
+    }
+    return {
+        "trace_id": state.trace_id,
+        "bytes": sections,
+        "total_bytes": sum(sections.values()),
+        "events": {
+            "total": len(events),
+            "in_memory": len(in_memory),
+            "spilled": events.spilled if isinstance(events, EventLog) else 0,
+            "spilled_bytes": events.spilled_bytes if isinstance(events, EventLog) else 0,
+        },
+    }
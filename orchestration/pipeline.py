@@ -0,0 +1,213 @@
+# orchestration/pipeline.py
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from orchestration.runner import run_plan
+from orchestration.singleflight import SingleFlight
+from orchestration.state import Event, WorkflowState
+from planner.classify import ClassificationResult, classify_request
+from planner.plan_templates import WorkflowPlan, build_plan
+
+
+_workflow_flights = SingleFlight("workflow")
+
+
+@dataclass
+class WorkflowResult:
+    """
+    Everything one end-to-end run produced.
+    This is what the UI renders and what the headless service returns.
+    """
+    classification: ClassificationResult
+    plan: Optional[WorkflowPlan]
+    state: WorkflowState
+    decision: Optional[Dict[str, Any]] = None
+    synthesis_error: Optional[str] = None
+    # store version the plan read (None if it ran no steps)
+    data_version: Optional[int] = None
+
+    # deterministic memo, available as soon as the packet is assembled
+    provisional_decision: Optional[Dict[str, Any]] = None
+    # pending Gemini call (llm.deterministic.SpeculativeDecision), if any
+    speculation: Optional[Any] = field(default=None, repr=False)
+    _finalize_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def synthesis_pending(self) -> bool:
+        return self.speculation is not None and self.decision is None
+
+    def finalize(self, timeout: Optional[float] = None) -> "WorkflowResult":
+        """
+        Waits for background Gemini synthesis (if any) and stores the final
+        memo in `decision`. On failure the provisional memo stays the answer
+        and `synthesis_error` is set. Safe to call more than once.
+        """
+        if not self.synthesis_pending:
+            return self
+        final = self.speculation.result(timeout=timeout)
+        with self._finalize_lock:  # coalesced callers may finalize the same result
+            if self.decision is not None:
+                return self
+            self.synthesis_error = final.get("_synthesis_error")
+            if self.synthesis_error:
+                self.state.log("ERROR", "synthesis", "Gemini synthesis failed", error=self.synthesis_error)
+            elif final.get("_disagreement"):
+                self.state.log("WARN", "synthesis", "Gemini disagrees with provisional decision", **final["_disagreement"])
+            else:
+                self.state.log("INFO", "synthesis", "Gemini confirmed provisional decision")
+            self.decision = final
+        return self
+
+    @property
+    def trace_id(self) -> str:
+        return self.state.trace_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly view (used by the service API)."""
+        return {
+            "trace_id": self.trace_id,
+            "workflow": self.classification.workflow.value,
+            "confidence": self.classification.confidence,
+            "missing_fields": self.classification.missing_fields,
+            "entities": self.state.entities,
+            "plan": [s.step_id for s in self.plan.steps] if self.plan else None,
+            "data_version": self.data_version,
+            "decision_packet": self.state.decision_packet,
+            "provisional_decision": self.provisional_decision,
+            "decision": self.decision,
+            "synthesis_pending": self.synthesis_pending,
+            "synthesis_error": self.synthesis_error,
+            "events": [asdict(e) for e in self.state.events],
+        }
+
+
+def run_workflow(
+    request_text: str,
+    use_gemini: bool = False,
+    trace_id: Optional[str] = None,
+    listeners: Optional[List[Callable[[Event], None]]] = None,
+    wait_for_synthesis: bool = True,
+    synthesize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    lean: bool = False,
+) -> WorkflowResult:
+    """
+    classify_request -> build_plan -> run_plan -> synthesis.
+
+    A deterministic provisional memo is always produced from the packet.
+    With `use_gemini`, the Gemini call runs in the background; pass
+    `wait_for_synthesis=False` to return right away with the provisional
+    memo and call `result.finalize()` later. `synthesize` replaces the
+    Gemini call (e.g. a stub for load tests).
+
+    `lean=True` keeps the state small for large batches: interned event
+    strings, events spilled to disk past a threshold and facts trimmed to
+    the packet fields the memo may cite (llm.packet.PACKET_FIELDS; see
+    orchestration/lean.py).
+
+    Step failures (StepFailed) propagate to the caller. A synthesis failure
+    does not: the deterministic packet is still useful, so it is returned
+    with `synthesis_error` set.
+    """
+    classification = classify_request(request_text)
+
+    state = WorkflowState(request_text=request_text, entities=dict(classification.entities), lean=lean)
+    if lean:
+        from orchestration.lean import EventLog
+
+        state.events = EventLog()
+    if trace_id:
+        state.trace_id = trace_id
+    state.listeners.extend(listeners or [])
+    state.log(
+        "INFO",
+        "classifier",
+        f"Classified request as {classification.workflow.value}",
+        confidence=classification.confidence,
+        missing_fields=classification.missing_fields,
+    )
+
+    plan = build_plan(classification.workflow)
+    if plan is None:
+        state.log("WARN", "planner", "No plan found for this workflow")
+        return WorkflowResult(classification=classification, plan=None, state=state)
+
+    pinned_version = None
+    if plan.steps:
+        # pin one data version for the whole plan so hourly ingests
+        # never mix old and new rows within a workflow
+        from tools.duckdb_store import snapshot
+
+        with snapshot() as data_version:
+            state.log("INFO", "runner", "Pinned analytics snapshot", data_version=data_version)
+            state = run_plan(state, plan)
+        pinned_version = data_version
+    else:
+        state = run_plan(state, plan)
+    if lean:
+        from llm.packet import PACKET_FIELDS
+        from orchestration.lean import trim_facts
+
+        # keep what the memo may cite; plans without a whitelist keep their outputs
+        fields = PACKET_FIELDS.get(classification.workflow)
+        paths = [f.path for f in fields] if fields else [p for step in plan.steps for p in step.produces]
+        state.facts = trim_facts(state.facts, paths)
+        if state.decision_packet is not None:
+            state.decision_packet["facts"] = state.facts
+    result = WorkflowResult(classification=classification, plan=plan, state=state, data_version=pinned_version)
+
+    if state.decision_packet is not None:
+        from llm.deterministic import SpeculativeDecision, synthesize_provisional
+
+        result.provisional_decision = synthesize_provisional(state.decision_packet)
+        state.log("INFO", "synthesis", "Provisional decision ready", decision=result.provisional_decision["decision"])
+
+        if use_gemini:
+            result.speculation = SpeculativeDecision(
+                state.decision_packet, provisional=result.provisional_decision, synthesize=synthesize
+            )
+            if wait_for_synthesis:
+                result.finalize()
+
+    if lean:
+        state.events.flush()  # the finished trace lives on disk until read
+    return result
+
+
+def normalize_request(request_text: str) -> str:
+    """Case- and whitespace-insensitive form used to detect duplicate requests."""
+    return " ".join(request_text.split()).casefold()
+
+
+def run_workflow_shared(
+    request_text: str,
+    use_gemini: bool = False,
+    trace_id: Optional[str] = None,
+    listeners: Optional[List[Callable[[Event], None]]] = None,
+    wait_for_synthesis: bool = True,
+    synthesize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    lean: bool = False,
+) -> Tuple[WorkflowResult, bool]:
+    """
+    run_workflow with single-flight coalescing: identical requests that are
+    already executing are not run again; the caller waits and shares the
+    in-flight result. Returns (result, shared).
+
+    A shared result carries the leader's trace_id and events, and its
+    `listeners` were never called. Treat it as read-only.
+    """
+    key = (normalize_request(request_text), use_gemini, wait_for_synthesis, lean)
+    return _workflow_flights.do(
+        key,
+        lambda: run_workflow(
+            request_text,
+            use_gemini=use_gemini,
+            trace_id=trace_id,
+            listeners=listeners,
+            wait_for_synthesis=wait_for_synthesis,
+            synthesize=synthesize,
+            lean=lean,
+        ),
+    )
@@ -0,0 +1,80 @@
+# orchestration/recording.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from orchestration.state import Event
+
+
+def step_timings(events: List[Event]) -> Dict[str, float]:
+    """Wall time per step_id (first to last event of that step), in ms."""
+    spans: Dict[str, List[datetime]] = {}
+    for e in events:
+        ts = datetime.fromisoformat(e.ts)
+        span = spans.setdefault(e.step_id, [ts, ts])
+        span[1] = ts
+    return {step: round((end - start).total_seconds() * 1000, 3) for step, (start, end) in spans.items()}
+
+
+def build_record(
+    request_text: str,
+    use_gemini: bool,
+    latency_ms: float,
+    result: Optional[Any] = None,
+    shared: bool = False,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One JSONL line: the request plus what its execution looked like.
+    `result` is an orchestration.pipeline.WorkflowResult (None on failure).
+    """
+    record: Dict[str, Any] = {
+        "recorded_at": time.time(),
+        "request_text": request_text,
+        "use_gemini": use_gemini,
+        "latency_ms": round(latency_ms, 3),
+        "error": error,
+    }
+    if result is not None:
+        decision = result.decision or {}
+        record.update(
+            {
+                "trace_id": result.trace_id,
+                "workflow": result.classification.workflow.value,
+                "confidence": result.classification.confidence,
+                "decision": (result.decision or result.provisional_decision or {}).get("decision"),
+                "step_timings_ms": step_timings(result.state.events),
+                "cache": {
+                    "workflow_coalesced": shared,
+                    "gemini_cached": decision.get("_cached"),
+                    "gemini_coalesced": bool(decision.get("_coalesced")),
+                },
+            }
+        )
+    return record
+
+
+class WorkflowRecorder:
+    """Thread-safe JSONL appender for workflow recordings (see benchmarks/loadgen.py)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_recordings(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -1,10 +1,16 @@
 # orchestration/runner.py
 from __future__ import annotations
 
-from typing import Any, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
 
 from orchestration.state import WorkflowState
-from planner.plan_templates import PlanStep, StepType, WorkflowPlan
+from planner.plan_templates import PlanStep, StepType, ToolCall, WorkflowPlan
+
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
 
 
 class StepFailed(Exception):
@@ -18,17 +24,49 @@ def _check_requires(state: WorkflowState, step: PlanStep) -> None:
         raise StepFailed(f"Step {step.step_id} missing required keys: {missing}")
 
 
-def _run_agent_step(state: WorkflowState, step: PlanStep) -> None:
-    from agents.sales_agent import run as run_sales
-    from agents.finance_agent import run as run_finance
-    from agents.data_agent import run as run_data
-    from agents.compliance_agent import run as run_compliance
+def _resolve_customer_name(state: WorkflowState, step: PlanStep) -> Dict[str, Any]:
+    """
+    Maps the extracted customer name onto a CRM account name (fuzzy, via the
+    trigram index) so variants like "Acme Inc" or "ACME" still match.
+    The entity is only rewritten when the match is strong and clearly ahead
+    of the runner-up; a wrong rewrite would price the deal on another
+    customer's data.
+    """
+    from tools.name_resolver import resolve_customer_name
+
+    raw = state.get("entities.customer_name")
+    res = resolve_customer_name(raw)
+    best = res.best
+    if best and res.confident:
+        if best.customer_name != raw:
+            state.entities["customer_name"] = best.customer_name
+            state.log(
+                "INFO", step.step_id, "Resolved customer name",
+                raw=raw, resolved=best.customer_name, confidence=round(res.confidence, 3),
+            )
+    else:
+        state.log(
+            "WARN", step.step_id, "Customer name not confidently resolved",
+            raw=raw,
+            confidence=round(res.confidence, 3),
+            margin=round(res.margin, 3),
+            candidates=[{"customer_name": c.customer_name, "score": c.score} for c in res.candidates],
+        )
+    return res.to_dict()
+
 
+def _run_agent_step(state: WorkflowState, step: PlanStep) -> None:
+    # Agents (and the tools/duckdb/pydantic behind them) are imported only by
+    # the branch that runs them, so a plan pays only for the steps it executes.
     state.log("INFO", step.step_id, f"Running agent step: {step.owner}.{step.action}")
 
     if step.owner == "SalesAgent" and step.action == "collect_deal_context":
+        from agents.sales_agent import run as run_sales
+
+        resolution = _resolve_customer_name(state, step)
         customer = state.get("entities.customer_name")
         out = run_sales(customer_name=customer)
+        out["resolution"] = resolution
         state.set("facts.sales", out)
 
         # If CRM provides discount/payment terms, backfill entities deterministically
@@ -39,26 +77,34 @@ def _run_agent_step(state: WorkflowState, step: PlanStep) -> None:
             state.entities.setdefault("payment_terms", opp["payment_terms"])
 
     elif step.owner == "FinanceAgent" and step.action == "compute_financials":
+        from agents.finance_agent import run as run_finance
+
         customer = state.get("entities.customer_name")
         amt = int(state.get("entities.deal_amount_usd"))
         term = int(state.get("entities.term_months"))
-        out = run_finance(customer_name=customer, deal_amount_usd=amt, term_months=term)
+        # the key (not the value) tells whether signals_fetch already ran
+        finance = state.facts.get("finance") or {}
+        out = run_finance(
+            customer_name=customer,
+            deal_amount_usd=amt,
+            term_months=term,
+            billing_profile=finance.get("billing_profile"),
+            prefetched="billing_profile" in finance,
+        )
         state.set("facts.finance", out)
 
     elif step.owner == "ComplianceAgent" and step.action == "validate_policy":
+        from agents.compliance_agent import run as run_compliance
+
         discount = int(float(state.get("entities.discount_pct") or 0))
         arr = int(state.get("facts.finance.computed_arr_usd"))
         out = run_compliance(discount_pct=discount, computed_arr_usd=arr)
         state.set("facts.compliance", out)
 
-    elif step.owner == "DataAgent" and step.action == "collect_usage_signals":
-        customer = state.get("entities.customer_name")
-        out = run_data(customer_name=customer)
-        state.set("facts.data", out)
-
     elif step.owner == "Orchestrator" and step.action == "assemble_decision_packet":
         packet: Dict[str, Any] = {
             "trace_id": state.trace_id,
+            "workflow": state.workflow,
             "request_text": state.request_text,
             "entities": state.entities,
             "facts": state.facts,
@@ -73,16 +119,73 @@ def _run_agent_step(state: WorkflowState, step: PlanStep) -> None:
 
 
 
+def _to_fact(value: Any) -> Any:
+    # tools return pydantic models; state holds plain JSON-friendly data
+    return value.model_dump() if hasattr(value, "model_dump") else value
+
+
+def _get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool-call")
+        return _tool_pool
+
+
+def _call_tool(call: ToolCall, kwargs: Dict[str, Any], data_version: Optional[int]) -> Tuple[Any, float]:
+    from tools.duckdb_store import snapshot
+    from tools.registry import get_tool
+
+    spec = get_tool(call.tool)
+    started = time.perf_counter()
+    if data_version is None:
+        value = spec.fn(**kwargs)
+    else:
+        # helper thread: read the same data version as the workflow
+        with snapshot(expect_version=data_version):
+            value = spec.fn(**kwargs)
+    return _to_fact(value), (time.perf_counter() - started) * 1000
+
+
+def _run_tool_step(state: WorkflowState, step: PlanStep) -> None:
+    from tools.duckdb_store import SnapshotMismatch, pinned_version
+
+    state.log("INFO", step.step_id, f"Running tool step: {step.action}", calls=[c.tool for c in step.tool_calls])
+
+    args = [{arg: state.get(key) for arg, key in c.inputs.items()} for c in step.tool_calls]
+
+    if len(step.tool_calls) == 1:
+        results = [_call_tool(step.tool_calls[0], args[0], None)]
+    else:
+        # independent calls fan out; each helper pins the workflow's data version
+        version = pinned_version()
+        pool = _get_tool_pool()
+        futures = [pool.submit(_call_tool, c, a, version) for c, a in zip(step.tool_calls, args)]
+        results = []
+        for call, kwargs, fut in zip(step.tool_calls, args, futures):
+            try:
+                results.append(fut.result())
+            except SnapshotMismatch:
+                # an ingest landed mid-step; redo this call on our own pinned thread
+                results.append(_call_tool(call, kwargs, None))
+
+    for call, (value, ms) in zip(step.tool_calls, results):
+        state.set(call.output, value)
+        state.log("INFO", step.step_id, f"Tool call completed: {call.tool}", output=call.output, duration_ms=round(ms, 2))
+
+    state.log("INFO", step.step_id, "Step completed", produces=step.produces)
+
+
 def run_plan(state: WorkflowState, plan: WorkflowPlan) -> WorkflowState:
+    state.workflow = plan.workflow.value
     state.log("INFO", "runner", f"Starting plan execution: {plan.workflow.value}", steps=len(plan.steps))
 
     for step in plan.steps:
-        if step.step_type != StepType.AGENT:
-            state.log("WARN", step.step_id, "Skipping non-agent step in Step 2", step_type=step.step_type.value)
-            continue
-
         _check_requires(state, step)
-        _run_agent_step(state, step)
+        if step.step_type == StepType.TOOL:
+            _run_tool_step(state, step)
+        else:
+            _run_agent_step(state, step)
 
     state.log("INFO", "runner", "Plan execution finished")
     return state
@@ -0,0 +1,78 @@
+# orchestration/singleflight.py
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# every SingleFlight registers here so counters can be reported in one place
+_REGISTRY: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs `fn`; callers arriving
+    while it is still in flight wait and receive the same result (or the
+    same exception). Nothing is remembered once the call returns; that is
+    the job of the caches behind `fn`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counters = {"calls": 0, "executions": 0, "coalesced": 0}
+        _REGISTRY[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Returns (result, shared). `shared` is True when this caller waited on
+        another caller's execution instead of running `fn` itself.
+        """
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """Counters for every SingleFlight in the process, keyed by name."""
+    return {name: sf.stats() for name, sf in _REGISTRY.items()}
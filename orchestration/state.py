@@ -3,11 +3,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
+import sys
 import uuid
 
 
-@dataclass
+@dataclass(slots=True)
 class Event:
     """
     An execution event for observability/debugging.
@@ -28,6 +29,7 @@ class WorkflowState:
     """
     trace_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     request_text: str = ""
+    workflow: str = ""       # WorkflowType value, set by run_plan
     entities: Dict[str, str] = field(default_factory=dict)
 
     # facts are structured outputs of agents/tools
@@ -39,13 +41,25 @@ class WorkflowState:
     # execution trace
     events: List[Event] = field(default_factory=list)
 
+    # callbacks invoked with every new Event (e.g. to stream progress to a client)
+    listeners: List[Callable[[Event], None]] = field(default_factory=list, repr=False, compare=False)
+
+    # memory-lean mode (orchestration/lean.py): repeated event strings are interned
+    lean: bool = False
+
     def _now(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
     def log(self, level: str, step_id: str, message: str, **details: Any) -> None:
-        self.events.append(
-            Event(ts=self._now(), level=level, step_id=step_id, message=message, details=details or {})
-        )
+        if self.lean:
+            # formatted messages ("Tool call completed: billing.profile") repeat
+            # across every workflow in a batch; keep one copy of each
+            level, step_id, message = sys.intern(level), sys.intern(step_id), sys.intern(message)
+            details = {sys.intern(k): v for k, v in details.items()}
+        event = Event(ts=self._now(), level=level, step_id=step_id, message=message, details=details or {})
+        self.events.append(event)
+        for listener in self.listeners:
+            listener(event)
 
     def get(self, dotted_key: str) -> Optional[Any]:
         """
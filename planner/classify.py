@@ -25,6 +25,8 @@ class ClassificationResult:
 _MONEY_RE = re.compile(r"\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(k|K|m|M)?")
 _TERM_RE = re.compile(r"(\d{1,2})\s*(month|months|mo|mos|year|years|yr|yrs)\b", re.IGNORECASE)
 _DISCOUNT_RE = re.compile(r"(\d{1,2}(?:\.\d+)?)\s*%?\s*(discount|off)\b", re.IGNORECASE)
+# where a customer name captured after "for" stops: a number/amount or a connective word
+_NAME_TAIL_RE = re.compile(r"\s+(?=\$|\d|(?:at|with|on|over|per|net)\b)", re.IGNORECASE)
 
 
 def _normalize_amount(amount_str: str, suffix: Optional[str]) -> Optional[str]:
@@ -82,7 +84,9 @@ def extract_entities(text: str) -> Dict[str, str]:
     # Example: "Approve $120k deal for Acme"
     for_match = re.search(r"\bfor\s+([A-Za-z0-9][A-Za-z0-9 &\-_]{1,50})", text, re.IGNORECASE)
     if for_match:
-        entities["customer_name"] = for_match.group(1).strip(" .,")
+        # "Acme 12 months at 15% off" -> "Acme"; fuzzy resolution happens at run time
+        name = _NAME_TAIL_RE.split(for_match.group(1), maxsplit=1)[0]
+        entities["customer_name"] = name.strip(" .,")
 
     return entities
 
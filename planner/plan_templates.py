@@ -1,7 +1,7 @@
 # planner/plan_templates.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional
 
@@ -10,14 +10,27 @@ from planner.classify import WorkflowType
 
 class StepType(str, Enum):
     AGENT = "AGENT"          # run an agent step
-    TOOL = "TOOL"            # (later) run a tool/mcp module step
+    TOOL = "TOOL"            # call registered tools directly (tools/registry.py)
+
+
+@dataclass(frozen=True)
+class ToolCall:
+    """
+    One tool invocation inside a TOOL step.
+    `inputs` maps tool argument names to state keys; the result (pydantic
+    models are dumped to dicts) is written to the `output` state key.
+    """
+    tool: str                # registered tool name, e.g. "billing.profile"
+    inputs: Dict[str, str]
+    output: str
 
 
 @dataclass(frozen=True)
 class PlanStep:
     """
     A single step in a workflow plan.
-    For now we only execute AGENT steps. TOOL steps come in Step 3+.
+    AGENT steps dispatch to an agent; TOOL steps run `tool_calls`, which are
+    independent of each other and may execute concurrently.
     """
     step_id: str
     step_type: StepType
@@ -26,6 +39,7 @@ class PlanStep:
     requires: List[str]      # state keys required before running
     produces: List[str]      # state keys produced after running
     description: str
+    tool_calls: List[ToolCall] = field(default_factory=list)   # TOOL steps only
 
 
 @dataclass(frozen=True)
@@ -50,6 +64,27 @@ def build_plan(workflow: WorkflowType) -> Optional[WorkflowPlan]:
             produces=["facts.sales"],
             description="Collect sales context (account + latest opportunity) via CRM tool.",
         ),
+        PlanStep(
+            step_id="signals_fetch",
+            step_type=StepType.TOOL,
+            owner="Orchestrator",
+            action="fetch_signals",
+            requires=["entities.customer_name"],
+            produces=["facts.finance.billing_profile", "facts.data.usage_summary"],
+            description="Fetch billing profile and usage signals concurrently (billing + analytics tools).",
+            tool_calls=[
+                ToolCall(
+                    tool="billing.profile",
+                    inputs={"customer_name": "entities.customer_name"},
+                    output="facts.finance.billing_profile",
+                ),
+                ToolCall(
+                    tool="analytics.usage_summary_3mo",
+                    inputs={"customer_name": "entities.customer_name"},
+                    output="facts.data.usage_summary",
+                ),
+            ],
+        ),
         PlanStep(
             step_id="finance_check",
             step_type=StepType.AGENT,
@@ -57,16 +92,7 @@ def build_plan(workflow: WorkflowType) -> Optional[WorkflowPlan]:
             action="compute_financials",
             requires=["request_text", "entities.customer_name", "entities.deal_amount_usd", "entities.term_months"],
             produces=["facts.finance.computed_arr_usd", "facts.finance.risk_flags", "facts.finance.billing_profile"],
-            description="Compute ARR and pull billing profile via billing tool.",
-        ),
-        PlanStep(
-            step_id="data_signals",
-            step_type=StepType.AGENT,
-            owner="DataAgent",
-            action="collect_usage_signals",
-            requires=["entities.customer_name"],
-            produces=["facts.data.usage_summary"],
-            description="Collect usage signals from analytics store (DuckDB).",
+            description="Compute ARR and billing risk from the fetched billing profile.",
         ),
         PlanStep(
             step_id="compliance_validate",
@@ -91,8 +117,8 @@ def build_plan(workflow: WorkflowType) -> Optional[WorkflowPlan]:
             produces=["decision_packet"],
             description="Assemble a structured decision packet for Gemini synthesis.",
         ),
-    ]
-    return WorkflowPlan(workflow=workflow, steps=steps)
+        ]
+        return WorkflowPlan(workflow=workflow, steps=steps)
 
 
     # (Optional stubs; we’ll implement later)
@@ -0,0 +1,250 @@
+# service/http_api.py
+"""
+Local HTTP front end for WorkflowService.
+
+    python -m service.http_api --port 8080 --workers 4 --queue-size 64
+
+Endpoints:
+  POST /workflows                  {"request_text": "...", "use_gemini": false}
+                                   -> 202 {"trace_id", "status_url", "events_url"}
+                                   -> 429 when the queue is full
+  GET  /workflows/<trace_id>        current status (+ result once finished)
+  GET  /workflows/<trace_id>/events NDJSON stream of events until the job finishes
+  GET  /healthz                     queue/worker stats
+  POST /admin/ingest               {"paths": ["accounts.jsonl", ...]}
+                                   -> 200 {"data_version"}; upserts change files into the live store.
+                                   Paths are relative to --ingest-dir; disabled (403) without it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+from service.workflow_service import ServiceOverloaded, WorkflowService
+
+
+def _resolve_ingest_paths(ingest_dir: Path, paths: List[Any]) -> List[Path]:
+    """Change-file paths resolved under `ingest_dir`; anything outside it is rejected."""
+    root = ingest_dir.resolve()
+    resolved = []
+    for p in paths:
+        if not isinstance(p, str) or not p:
+            raise ValueError("paths must be non-empty strings")
+        full = (root / p).resolve()
+        if not full.is_relative_to(root):
+            raise ValueError(f"Path is outside the ingest directory: {p}")
+        resolved.append(full)
+    return resolved
+
+
+def make_handler(service: WorkflowService, ingest_dir: str | None = None) -> type:
+    class WorkflowHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] | None = None) -> None:
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+            body = json.loads(raw.decode("utf-8"))
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+            return body
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") == "/admin/ingest":
+                self._ingest()
+                return
+            if self.path.rstrip("/") != "/workflows":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            try:
+                body = self._read_json()
+                request_text = body.get("request_text")
+                if not isinstance(request_text, str) or not request_text.strip():
+                    raise ValueError("request_text is required")
+            except (ValueError, UnicodeDecodeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                job = service.submit(request_text, use_gemini=bool(body.get("use_gemini", False)))
+            except ServiceOverloaded as e:
+                self._send_json(429, {"error": str(e)}, headers={"Retry-After": "1"})
+                return
+
+            self._send_json(
+                202,
+                {
+                    "trace_id": job.trace_id,
+                    "status": job.status.value,
+                    "status_url": f"/workflows/{job.trace_id}",
+                    "events_url": f"/workflows/{job.trace_id}/events",
+                },
+            )
+
+        def _ingest(self) -> None:
+            if ingest_dir is None:
+                self._send_json(403, {"error": "ingest is disabled; start the service with --ingest-dir"})
+                return
+
+            import duckdb
+
+            from tools.ingest import ingest_change_files
+            from tools.sharding import ShardError, ShardRequestError
+
+            try:
+                body = self._read_json()
+                paths = body.get("paths")
+                if not isinstance(paths, list) or not paths:
+                    raise ValueError("paths must be a non-empty list")
+                table = body.get("table")
+                if table is not None and not isinstance(table, str):
+                    raise ValueError("table must be a string")
+                version = ingest_change_files(_resolve_ingest_paths(Path(ingest_dir), paths), table=table)
+            except (ValueError, UnicodeDecodeError, OSError, duckdb.Error, ShardRequestError) as e:
+                # bad request body, unreadable file or rows that don't fit the
+                # table (checked locally or by the owning shard)
+                self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+                return
+            except ShardError as e:  # a shard is down
+
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"data_version": version})
+
+        def do_GET(self) -> None:
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+
+            if parts == ["healthz"]:
+                self._send_json(200, service.stats())
+                return
+
+            if len(parts) in (2, 3) and parts[0] == "workflows":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send_json(404, {"error": f"unknown trace_id {parts[1]}"})
+                elif len(parts) == 2:
+                    self._send_json(200, job.to_dict())
+                elif parts[2] == "events":
+                    self._stream_events(job)
+                else:
+                    self._send_json(404, {"error": "not found"})
+                return
+
+            self._send_json(404, {"error": "not found"})
+
+        def _stream_events(self, job: Any) -> None:
+            # NDJSON over a close-delimited response: one event per line,
+            # then a final {"status": ...} line once the job is finished.
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            seen = 0
+            try:
+                while True:
+                    new_events, done = service.wait_for_update(job, seen)
+                    for e in new_events:
+                        self.wfile.write((json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8"))
+                    seen += len(new_events)
+                    self.wfile.flush()
+                    if done:
+                        final = job.to_dict(include_events=False)
+                        self.wfile.write((json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8"))
+                        return
+            except (BrokenPipeError, ConnectionResetError):
+                return  # client went away
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass  # keep the console quiet; events carry the useful trace
+
+    return WorkflowHandler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 4,
+    queue_size: int = 64,
+    preload: bool = False,
+    record_path: str | None = None,
+    shards: int = 0,
+    shard_dir: str | None = None,
+    shard_addresses: List[str] | None = None,
+    lean: bool = False,
+    ingest_dir: str | None = None,
+) -> None:
+    if shards or shard_addresses:
+        # customers hash-partitioned across shard servers: shared ones at
+        # `shard_addresses`, or private processes spawned by this worker
+        from tools.sharding import configure_sharding
+
+        configure_sharding(shards or None, data_dir=shard_dir, addresses=shard_addresses)
+    if preload:
+        # pay the data load before taking traffic instead of on the first request
+        from tools.duckdb_store import preload as preload_store
+
+        preload_store()
+    service = WorkflowService(num_workers=workers, max_queue=queue_size, record_path=record_path, lean=lean).start()
+    server = ThreadingHTTPServer((host, port), make_handler(service, ingest_dir=ingest_dir))
+    server.daemon_threads = True
+    print(f"Workflow service listening on http://{host}:{port} ({workers} workers, queue={queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop(timeout=5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless workflow service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--preload", action="store_true", help="load the analytics store and name index before serving")
+    parser.add_argument("--record", metavar="PATH", help="append request/trace recordings (JSONL) for load replay")
+    parser.add_argument("--shards", type=int, default=0, help="partition the analytics store across N shard processes")
+    parser.add_argument(
+        "--shard-addresses",
+        metavar="HOST:PORT,...",
+        help="attach to running shard servers (python -m tools.sharding serve), in shard-id order",
+    )
+    parser.add_argument("--shard-dir", metavar="DIR", help="keep shard databases as files in DIR (default: in memory)")
+    parser.add_argument("--ingest-dir", metavar="DIR", help="enable POST /admin/ingest for change files under DIR")
+    parser.add_argument("--lean", action="store_true", help="memory-lean workflow state (spilled traces, trimmed facts)")
+    args = parser.parse_args()
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        preload=args.preload,
+        record_path=args.record,
+        shards=args.shards,
+        shard_dir=args.shard_dir,
+        shard_addresses=args.shard_addresses.split(",") if args.shard_addresses else None,
+        lean=args.lean,
+        ingest_dir=args.ingest_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
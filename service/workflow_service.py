@@ -0,0 +1,284 @@
+# service/workflow_service.py
+from __future__ import annotations
+
+import copy
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from orchestration.lean import EventLog
+from orchestration.singleflight import coalescing_stats
+from orchestration.state import Event
+
+
+class ServiceOverloaded(Exception):
+    """Raised by submit() when the request queue is full (maps to HTTP 429)."""
+    pass
+
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED}
+
+
+@dataclass
+class Job:
+    """
+    One submitted workflow, tracked by trace_id.
+    Workers mutate it under `cond`; readers wait on `cond` for progress.
+    With a lean service, `events` is a spilling EventLog rather than dicts.
+    """
+    trace_id: str
+    request_text: str
+    use_gemini: bool
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    events: Union[List[Dict[str, Any]], EventLog] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self, include_events: bool = True) -> Dict[str, Any]:
+        with self.cond:
+            out: Dict[str, Any] = {
+                "trace_id": self.trace_id,
+                "status": self.status.value,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "result": self.result,
+            }
+            if include_events:
+                out["events"] = _event_dicts(self.events)
+            return out
+
+
+def _event_dicts(events: Any) -> List[Dict[str, Any]]:
+    return [e if isinstance(e, dict) else asdict(e) for e in events]
+
+
+def _retrace(payload: Dict[str, Any], leader_trace_id: str, trace_id: str) -> Dict[str, Any]:
+    """Deep copy of a result payload with the leader's trace_id replaced by ours."""
+    payload = copy.deepcopy(payload)
+    packet = payload.get("decision_packet")
+    if packet and packet.get("trace_id") == leader_trace_id:
+        packet["trace_id"] = trace_id
+    for key in ("provisional_decision", "decision"):
+        audit = (payload.get(key) or {}).get("audit")
+        if audit and audit.get("trace_id") == leader_trace_id:
+            audit["trace_id"] = trace_id
+    return payload
+
+
+class WorkflowService:
+    """
+    Headless workflow execution: a bounded request queue drained by a pool
+    of worker threads. Each worker runs the full pipeline
+    (classify -> plan -> run_plan -> synthesis) via run_workflow_shared,
+    so duplicate requests already in flight are coalesced.
+
+    Admission control is the queue bound: submit() raises ServiceOverloaded
+    instead of letting work pile up. Finished jobs are kept (up to
+    `max_retained`) so callers can poll by trace_id.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 4,
+        max_queue: int = 64,
+        max_retained: int = 1000,
+        record_path: Optional[str] = None,
+        lean: bool = False,
+    ):
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        self.num_workers = num_workers
+        self.max_queue = max_queue
+        self.max_retained = max_retained
+        self.lean = lean  # memory-lean workflow state (orchestration/lean.py)
+
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+
+        # optional JSONL recording of real traffic, replayable with benchmarks/loadgen.py
+        self._recorder = None
+        if record_path:
+            from orchestration.recording import WorkflowRecorder
+
+            self._recorder = WorkflowRecorder(record_path)
+
+    # --- lifecycle ---
+
+    def start(self) -> "WorkflowService":
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"workflow-worker-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Lets queued jobs drain, then stops the workers."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for t in self._workers:
+            t.join(timeout)
+        self._workers.clear()
+
+    # --- client API ---
+
+    def submit(self, request_text: str, use_gemini: bool = False) -> Job:
+        job = Job(trace_id=str(uuid.uuid4()), request_text=request_text, use_gemini=use_gemini)
+        if self.lean:
+            job.events = EventLog()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._jobs_lock:
+                self._counters["rejected"] += 1
+            raise ServiceOverloaded(f"Request queue is full ({self.max_queue} pending)") from None
+
+        with self._jobs_lock:
+            self._counters["submitted"] += 1
+            self._jobs[job.trace_id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, trace_id: str) -> Optional[Job]:
+        with self._jobs_lock:
+            return self._jobs.get(trace_id)
+
+    def wait_for_update(self, job: Job, seen_events: int, timeout: float = 15.0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Blocks until `job` has more than `seen_events` events or finishes.
+        Returns (new_events, done). Used for streaming status.
+        """
+        with job.cond:
+            job.cond.wait_for(lambda: len(job.events) > seen_events or job.done, timeout=timeout)
+            return _event_dicts(job.events[seen_events:]), job.done
+
+    def stats(self) -> Dict[str, Any]:
+        with self._jobs_lock:
+            running = sum(1 for j in self._jobs.values() if j.status == JobStatus.RUNNING)
+            return {
+                "workers": self.num_workers,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self.max_queue,
+                "running": running,
+                **self._counters,
+                "coalescing": coalescing_stats(),
+            }
+
+    # --- internals ---
+
+    def _evict_finished(self) -> None:
+        # caller holds _jobs_lock; oldest finished jobs go first
+        excess = len(self._jobs) - self.max_retained
+        if excess <= 0:
+            return
+        for trace_id in [tid for tid, j in self._jobs.items() if j.done][:excess]:
+            job = self._jobs.pop(trace_id)
+            if isinstance(job.events, EventLog):
+                job.events.release()  # frees its spilled segments
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, job: Job) -> None:
+        from orchestration.pipeline import run_workflow_shared
+
+        def on_event(event: Event) -> None:
+            with job.cond:
+                job.events.append(event if isinstance(job.events, EventLog) else asdict(event))
+                job.cond.notify_all()
+
+        with job.cond:
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            job.cond.notify_all()
+
+        def publish(result: Any, shared: bool) -> Dict[str, Any]:
+            payload = result.to_dict()
+            payload.pop("events", None)  # already streamed into job.events
+            if shared:
+                # the packet and memos belong to the leader's run; give this job
+                # its own copies so every trace_id in its audit trail is its own
+                payload = _retrace(payload, result.trace_id, job.trace_id)
+            payload["trace_id"] = job.trace_id
+            payload["coalesced_with"] = result.trace_id if shared else None
+            with job.cond:
+                job.result = payload
+                job.cond.notify_all()
+            return payload
+
+        try:
+            result, shared = run_workflow_shared(
+                job.request_text,
+                use_gemini=job.use_gemini,
+                trace_id=job.trace_id,
+                listeners=[on_event],
+                wait_for_synthesis=False,
+                lean=self.lean,
+            )
+            if shared:
+                # another job ran this request; replay its trace for our callers
+                for event in result.state.events:
+                    on_event(event)
+            if result.synthesis_pending:
+                # pollers see the provisional memo while Gemini is still running
+                publish(result, shared)
+                result.finalize()
+                if shared:
+                    for event in result.state.events[len(job.events) :]:
+                        on_event(event)
+            payload = publish(result, shared)
+            status, error = JobStatus.SUCCEEDED, None
+        except Exception as e:
+            result, shared = None, False
+            payload, status, error = None, JobStatus.FAILED, f"{type(e).__name__}: {e}"
+
+        with job.cond:
+            job.result = payload
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+            if isinstance(job.events, EventLog):
+                job.events.flush()
+            job.cond.notify_all()
+
+        with self._jobs_lock:
+            self._counters["succeeded" if status == JobStatus.SUCCEEDED else "failed"] += 1
+
+        if self._recorder is not None:
+            from orchestration.recording import build_record
+
+            latency_ms = (job.finished_at - job.submitted_at) * 1000
+            self._recorder.write(
+                build_record(job.request_text, job.use_gemini, latency_ms, result=result, shared=shared, error=error)
+            )
@@ -3,7 +3,8 @@ from __future__ import annotations
 
 from pydantic import BaseModel, Field
 
-from tools.duckdb_store import get_conn
+from tools.duckdb_store import query_customer
+from tools.registry import register_tool
 
 
 class BillingProfile(BaseModel):
@@ -13,12 +14,14 @@ class BillingProfile(BaseModel):
     on_time_payment_rate: float = Field(ge=0.0, le=1.0)
 
 
+@register_tool("billing.profile", "Subscription billing profile (Stripe-like)")
 def get_billing_profile(customer_name: str) -> BillingProfile | None:
-    con = get_conn()
-    row = con.execute(
+    rows = query_customer(
+        customer_name,
         "SELECT * FROM subscriptions WHERE lower(customer_name) = lower(?) LIMIT 1",
         [customer_name],
-    ).fetchone()
+    )
+    row = rows[0] if rows else None
     if not row:
         return None
     return BillingProfile(
@@ -3,7 +3,8 @@ from __future__ import annotations
 
 from pydantic import BaseModel, Field
 
-from tools.duckdb_store import get_conn
+from tools.duckdb_store import query_all, query_customer
+from tools.registry import register_tool
 
 
 class CRMAccount(BaseModel):
@@ -22,12 +23,18 @@ class CRMOpportunity(BaseModel):
     owner: str
 
 
+class AccountContext(BaseModel):
+    account: CRMAccount
+    opportunity: CRMOpportunity | None = None
+
+
 def get_account_by_customer_name(customer_name: str) -> CRMAccount | None:
-    con = get_conn()
-    row = con.execute(
+    rows = query_customer(
+        customer_name,
         "SELECT * FROM accounts WHERE lower(customer_name) = lower(?) LIMIT 1",
         [customer_name],
-    ).fetchone()
+    )
+    row = rows[0] if rows else None
     if not row:
         return None
     return CRMAccount(
@@ -36,11 +43,11 @@ def get_account_by_customer_name(customer_name: str) -> CRMAccount | None:
 
 
 def get_latest_opportunity_for_account(account_id: str) -> CRMOpportunity | None:
-    con = get_conn()
-    row = con.execute(
+    rows = query_all(
         "SELECT * FROM opportunities WHERE account_id = ? LIMIT 1",
         [account_id],
-    ).fetchone()
+    )
+    row = rows[0] if rows else None
     if not row:
         return None
     return CRMOpportunity(
@@ -51,3 +58,41 @@ def get_latest_opportunity_for_account(account_id: str) -> CRMOpportunity | None
         payment_terms=row[4],
         owner=row[5],
     )
+
+
+@register_tool("crm.account_with_latest_opportunity", "CRM account + latest opportunity in one query")
+def get_account_with_latest_opportunity(customer_name: str) -> AccountContext | None:
+    """
+    Fused form of get_account_by_customer_name + get_latest_opportunity_for_account:
+    one LEFT JOIN instead of two round trips.
+    """
+    rows = query_customer(
+        customer_name,
+        """
+        SELECT
+          a.account_id, a.customer_name, a.segment, a.region,
+          o.opportunity_id, o.stage, o.requested_discount_pct, o.payment_terms, o.owner
+        FROM (
+          SELECT * FROM accounts WHERE lower(customer_name) = lower(?) LIMIT 1
+        ) a
+        LEFT JOIN opportunities o ON o.account_id = a.account_id
+        LIMIT 1
+        """,
+        [customer_name],
+    )
+    row = rows[0] if rows else None
+    if not row:
+        return None
+
+    account = CRMAccount(account_id=row[0], customer_name=row[1], segment=row[2], region=row[3])
+    opportunity = None
+    if row[4] is not None:
+        opportunity = CRMOpportunity(
+            opportunity_id=row[4],
+            account_id=row[0],
+            stage=row[5],
+            requested_discount_pct=row[6],
+            payment_terms=row[7],
+            owner=row[8],
+        )
+    return AccountContext(account=account, opportunity=opportunity)
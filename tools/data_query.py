@@ -3,7 +3,8 @@ from __future__ import annotations
 
 from pydantic import BaseModel, Field
 
-from tools.duckdb_store import get_conn
+from tools.duckdb_store import query_customer
+from tools.registry import register_tool
 
 
 class UsageSummary(BaseModel):
@@ -12,20 +13,27 @@ class UsageSummary(BaseModel):
     avg_weekly_active_ratio_3mo: float = Field(ge=0.0, le=1.0)
 
 
+@register_tool("analytics.usage_summary_3mo", "Average seats and weekly active ratio over the last 3 months")
 def get_usage_summary_last_3_months(customer_name: str) -> UsageSummary | None:
-    con = get_conn()
-    row = con.execute(
+    rows = query_customer(
+        customer_name,
         """
         SELECT
           customer_name,
           avg(active_seats) as avg_active_seats_3mo,
           avg(weekly_active_ratio) as avg_weekly_active_ratio_3mo
-        FROM usage_metrics
-        WHERE lower(customer_name) = lower(?)
+        FROM (
+          -- the customer's latest 3 months; ingests keep appending new ones
+          SELECT customer_name, active_seats, weekly_active_ratio
+          FROM usage_metrics
+          WHERE lower(customer_name) = lower(?)
+          QUALIFY row_number() OVER (PARTITION BY customer_name ORDER BY month DESC) <= 3
+        )
         GROUP BY customer_name
         """,
         [customer_name],
-    ).fetchone()
+    )
+    row = rows[0] if rows else None
 
     if not row:
         return None
@@ -1,38 +1,210 @@
 # tools/duckdb_store.py
 from __future__ import annotations
 
+import threading
+from contextlib import contextmanager
 from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
 
-import duckdb
-import pandas as pd
+if TYPE_CHECKING:
+    import duckdb
+    import pandas as pd
 
-from data.mock_data import ACCOUNTS, OPPORTUNITIES, SUBSCRIPTIONS, USAGE_METRICS
+# duckdb, pandas and the data load are deferred until the first query, so
+# importing a tool (or a worker process that never queries) stays cheap.
+
+_local = threading.local()
+_init_lock = threading.Lock()
+
+# callbacks(version, changes) run after every committed ingest, where
+# changes is {table: DataFrame of the upserted rows}
+_change_listeners: List[Callable[[int, Dict[str, "pd.DataFrame"]], None]] = []
+
+
+def get_conn() -> "duckdb.DuckDBPyConnection":
+    """
+    Returns a cursor on the shared in-memory database for the calling thread.
+
+    A single DuckDB connection must not be used from several threads at once,
+    so each thread (Streamlit script thread, service workers) gets its own
+    cursor. All cursors see the same tables.
+    """
+    cur = getattr(_local, "cursor", None)
+    if cur is None:
+        with _init_lock:  # only one thread builds the tables
+            cur = _base_conn().cursor()
+        _local.cursor = cur
+    return cur
 
 
 @lru_cache(maxsize=1)
-def get_conn() -> duckdb.DuckDBPyConnection:
+def _base_conn() -> "duckdb.DuckDBPyConnection":
     """
     Creates an in-memory DuckDB connection and loads mock tables.
 
     We cache the connection so Streamlit reruns don't recreate tables repeatedly.
     """
+    import duckdb
+    import pandas as pd
+
+    from data.mock_data import ACCOUNTS, OPPORTUNITIES, SUBSCRIPTIONS, USAGE_METRICS
+
     con = duckdb.connect(database=":memory:")
+    _create_tables(
+        con,
+        {
+            "accounts": pd.DataFrame(ACCOUNTS),
+            "opportunities": pd.DataFrame(OPPORTUNITIES),
+            "subscriptions": pd.DataFrame(SUBSCRIPTIONS),
+            "usage_metrics": pd.DataFrame(USAGE_METRICS),
+        },
+    )
+    return con
 
-    # Convert Python lists of dicts -> pandas DataFrames (DuckDB-friendly)
-    df_accounts = pd.DataFrame(ACCOUNTS)
-    df_opps = pd.DataFrame(OPPORTUNITIES)
-    df_subs = pd.DataFrame(SUBSCRIPTIONS)
-    df_usage = pd.DataFrame(USAGE_METRICS)
 
-    # Register DataFrames as DuckDB views and materialize as tables
-    con.register("accounts_df", df_accounts)
-    con.register("opportunities_df", df_opps)
-    con.register("subscriptions_df", df_subs)
-    con.register("usage_metrics_df", df_usage)
+def _create_tables(con: "duckdb.DuckDBPyConnection", frames: Dict[str, "pd.DataFrame"]) -> None:
+    """Materializes table -> DataFrame as DuckDB tables, plus the version row."""
+    for table, df in frames.items():
+        # Register DataFrames as DuckDB views and materialize as tables
+        con.register(f"{table}_df", df)
+        con.execute(f"CREATE TABLE {table} AS SELECT * FROM {table}_df")
+        con.unregister(f"{table}_df")
 
-    con.execute("CREATE TABLE accounts AS SELECT * FROM accounts_df")
-    con.execute("CREATE TABLE opportunities AS SELECT * FROM opportunities_df")
-    con.execute("CREATE TABLE subscriptions AS SELECT * FROM subscriptions_df")
-    con.execute("CREATE TABLE usage_metrics AS SELECT * FROM usage_metrics_df")
+    # Data version, bumped in the same transaction as every ingest (tools/ingest.py)
+    con.execute("CREATE TABLE _store_meta (version BIGINT)")
+    con.execute("INSERT INTO _store_meta VALUES (0)")
 
-    return con
+
+def _sharded_store():
+    """The ShardedStore when sharded mode is on (tools/sharding.py), else None."""
+    from tools.sharding import get_sharded_store
+
+    return get_sharded_store()
+
+
+def query_customer(customer_name: str, sql: str, params: Optional[list] = None) -> List[tuple]:
+    """
+    Runs a query whose rows all belong to one customer. In sharded mode it
+    is routed to the shard that owns `customer_name`; otherwise it runs on
+    the calling thread's cursor (and its pinned snapshot).
+    """
+    store = _sharded_store()
+    if store is not None:
+        return store.query(customer_name, sql, params)
+    return get_conn().execute(sql, params or []).fetchall()
+
+
+def query_all(sql: str, params: Optional[list] = None, latest: bool = False) -> List[tuple]:
+    """
+    Runs a bulk query over every customer. In sharded mode it is scattered to
+    all shards and the rows are concatenated, so it must not rely on
+    cross-customer ORDER BY / aggregates.
+
+    `latest=True` reads the newest committed data even if the calling thread
+    is pinned to an older snapshot.
+    """
+    store = _sharded_store()
+    if store is not None:
+        return store.scatter(sql, params)
+    if not latest:
+        return get_conn().execute(sql, params or []).fetchall()
+    con = _base_conn().cursor()
+    try:
+        return con.execute(sql, params or []).fetchall()
+    finally:
+        con.close()
+
+
+def data_version() -> int:
+    """Version of the data visible to the calling thread (its snapshot, if pinned)."""
+    store = _sharded_store()
+    if store is not None:
+        return pinned_version() if pinned_version() is not None else store.version
+    return int(get_conn().execute("SELECT version FROM _store_meta").fetchone()[0])
+
+
+class SnapshotMismatch(RuntimeError):
+    """A snapshot could not be pinned at the requested data version."""
+    pass
+
+
+def pinned_version() -> Optional[int]:
+    """Data version pinned by snapshot() on the calling thread, if any."""
+    return getattr(_local, "snapshot_version", None)
+
+
+@contextmanager
+def snapshot(expect_version: Optional[int] = None) -> Iterator[int]:
+    """
+    Pins the calling thread's view of the store for the duration of the block.
+
+    Every tool query in the block reads the same data version, even if an
+    ingest commits in the meantime (DuckDB snapshot isolation). Yields the
+    pinned version. Nested use reuses the outer snapshot.
+
+    Helper threads working for a pinned workflow pass `expect_version`; if
+    an ingest has landed since, SnapshotMismatch is raised so the caller can
+    fall back to its own (pinned) thread.
+
+    Sharded mode isolates nothing (see below): the version is read once per
+    workflow and helpers just carry it, so they never ask the shards again.
+    """
+    current = pinned_version()
+    if current is not None:
+        if expect_version is not None and current != expect_version:
+            raise SnapshotMismatch(f"Thread is pinned at version {current}, not {expect_version}")
+        yield current
+        return
+
+    store = _sharded_store()
+    if store is not None:
+        # Shards cannot share one transaction, so each query reads the
+        # shard's latest committed data and the version is only a label
+        # (for caches and the UI). Helpers reuse the caller's label rather
+        # than broadcasting for a check that guarantees nothing.
+        version = store.version if expect_version is None else expect_version
+        _local.snapshot_version = version
+        try:
+            yield version
+        finally:
+            _local.snapshot_version = None
+        return
+
+    con = get_conn()
+    con.execute("BEGIN TRANSACTION")
+    try:
+        version = data_version()
+        if expect_version is not None and version != expect_version:
+            raise SnapshotMismatch(f"Store is at version {version}, not {expect_version}")
+        _local.snapshot_version = version
+        yield version
+    finally:
+        _local.snapshot_version = None
+        con.execute("ROLLBACK")  # read-only; nothing to commit
+
+
+def on_data_change(callback: Callable[[int, Dict[str, "pd.DataFrame"]], None]) -> None:
+    """
+    Registers a callback(version, changes) for dependent caches. `changes`
+    maps each touched table to the rows upserted into it, so caches can
+    update incrementally instead of re-reading the table.
+    """
+    _change_listeners.append(callback)
+
+
+def _notify_data_change(version: int, changes: Dict[str, "pd.DataFrame"]) -> None:
+    changed = {t: df for t, df in changes.items() if len(df)}
+    for callback in list(_change_listeners):
+        callback(version, changed)
+
+
+def preload() -> None:
+    """
+    Builds the store and the customer-name index now instead of on the
+    first workflow (e.g. at worker start).
+    """
+    from tools.name_resolver import get_index
+
+    if _sharded_store() is None:
+        get_conn()
+    get_index()
@@ -0,0 +1,129 @@
+# tools/ingest.py
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
+
+from tools.duckdb_store import _base_conn, _notify_data_change, _sharded_store
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Natural key per table. Rows in a change set replace existing rows with the
+# same key; rows with a new key are appended (e.g. a new usage month).
+TABLE_KEYS: Dict[str, list[str]] = {
+    "accounts": ["account_id"],
+    "opportunities": ["opportunity_id"],
+    "subscriptions": ["customer_name"],
+    "usage_metrics": ["customer_name", "month"],
+}
+
+# one writer at a time; readers are never blocked
+_ingest_lock = threading.Lock()
+
+
+def _table_for_file(path: Path) -> str:
+    """`accounts.jsonl`, `usage_metrics-2026-10-19T10.parquet` -> table name."""
+    stem = path.name.split(".")[0]
+    for table in sorted(TABLE_KEYS, key=len, reverse=True):
+        if stem == table or stem.startswith(table + "-") or stem.startswith(table + "_"):
+            return table
+    raise ValueError(f"Cannot infer target table from file name: {path.name}")
+
+
+def read_change_file(path: Union[str, Path]) -> "pd.DataFrame":
+    """Reads a Parquet or JSONL change file into a DataFrame."""
+    import duckdb
+
+    path = Path(path)
+    if path.suffix == ".parquet":
+        sql = "SELECT * FROM read_parquet(?)"
+    elif path.suffix in (".jsonl", ".ndjson"):
+        sql = "SELECT * FROM read_json_auto(?, format = 'newline_delimited')"
+    else:
+        raise ValueError(f"Unsupported change file type: {path.suffix} (expected .parquet or .jsonl)")
+    # scratch connection: reading a file needs no tables (and no store load)
+    con = duckdb.connect()
+    try:
+        return con.execute(sql, [str(path)]).df()
+    finally:
+        con.close()
+
+
+def apply_changes(changes: Dict[str, "pd.DataFrame"]) -> int:
+    """
+    Upserts change sets into the live store in ONE transaction and bumps the
+    data version. Workflows inside `duckdb_store.snapshot()` keep reading the
+    version they pinned; new queries see the new data. Dependent caches are
+    notified after the commit.
+
+    In sharded mode each shard commits its part on its own (see
+    tools/sharding.py), so the update is atomic per customer only.
+
+    Returns the new data version.
+    """
+    for table in changes:
+        if table not in TABLE_KEYS:
+            raise ValueError(f"Unknown table: {table}")
+
+    store = _sharded_store()
+    if store is not None:
+        version = store.apply_changes(changes)  # split by owning shard
+        _notify_data_change(version, changes)
+        return version
+
+    with _ingest_lock:
+        con = _base_conn().cursor()  # private writer; thread cursors may be mid-snapshot
+        try:
+            con.execute("BEGIN TRANSACTION")
+            try:
+                for table, df in changes.items():
+                    _upsert(con, table, df)
+                con.execute("UPDATE _store_meta SET version = version + 1")
+                version = int(con.execute("SELECT version FROM _store_meta").fetchone()[0])
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+        finally:
+            con.close()
+
+    _notify_data_change(version, changes)
+    return version
+
+
+def _upsert(con, table: str, df: "pd.DataFrame") -> None:
+    if df.empty:
+        return
+    keys = TABLE_KEYS[table]
+    columns = [d[0] for d in con.execute(f"SELECT * FROM {table} LIMIT 0").description]
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Change set for {table} is missing columns: {missing}")
+
+    # last row wins when a change file mentions the same key twice
+    staged = df[columns].drop_duplicates(subset=keys, keep="last")
+    con.register("_staged", staged)
+    try:
+        match = " AND ".join(f"{table}.{k} = _staged.{k}" for k in keys)
+        col_list = ", ".join(columns)
+        con.execute(f"DELETE FROM {table} USING _staged WHERE {match}")
+        con.execute(f"INSERT INTO {table} ({col_list}) SELECT {col_list} FROM _staged")
+    finally:
+        con.unregister("_staged")
+
+
+def ingest_change_files(paths: Iterable[Union[str, Path]], table: Optional[str] = None) -> int:
+    """
+    Applies change files (Parquet/JSONL) as one atomic update. The target
+    table is inferred from each file name unless `table` is given.
+    Returns the new data version.
+    """
+    import pandas as pd
+
+    frames: Dict[str, list] = {}
+    for p in paths:
+        p = Path(p)
+        frames.setdefault(table or _table_for_file(p), []).append(read_change_file(p))
+    return apply_changes({t: pd.concat(dfs, ignore_index=True) for t, dfs in frames.items()})
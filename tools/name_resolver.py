@@ -0,0 +1,334 @@
+# tools/name_resolver.py
+from __future__ import annotations
+
+import math
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from tools.duckdb_store import _sharded_store, on_data_change, pinned_version, query_all
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# A match is applied to the request only when it scores at least
+# MIN_CONFIDENCE and leads the runner-up by MIN_MARGIN; otherwise the
+# candidates are reported and the raw name is kept
+MIN_CONFIDENCE = 0.8
+MIN_MARGIN = 0.2
+
+# phrases after "for" rarely need more than this many tokens to name a customer
+_MAX_PHRASE_TOKENS = 6
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+# tokens that may trail a customer name without changing who it is
+# ("Acme Inc" is Acme; "Acme Holdings Group" is not)
+_FILLER_TOKENS = frozenset(
+    {"inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "llc", "plc", "gmbh", "ag", "sa"}
+)
+
+
+def normalize_name(name: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", name.casefold()).strip()
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class NameCandidate:
+    account_id: str
+    customer_name: str
+    score: float              # Dice coefficient over character trigrams, 0..1
+
+
+@dataclass
+class NameResolution:
+    query: str
+    matched_text: str         # the part of `query` that produced the best match
+    candidates: List[NameCandidate] = field(default_factory=list)
+    coverage: float = 1.0     # share of the query's meaningful tokens inside matched_text
+
+    @property
+    def best(self) -> Optional[NameCandidate]:
+        return self.candidates[0] if self.candidates else None
+
+    @property
+    def confidence(self) -> float:
+        return self.best.score * self.coverage if self.best else 0.0
+
+    @property
+    def margin(self) -> float:
+        """Lead of the best candidate over the runner-up (all of it if there is none)."""
+        if len(self.candidates) < 2:
+            return self.confidence
+        return self.confidence - self.candidates[1].score * self.coverage
+
+    @property
+    def confident(self) -> bool:
+        """Strong and unambiguous enough to replace the name in the request."""
+        return self.confidence >= MIN_CONFIDENCE and self.margin >= MIN_MARGIN
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "query": self.query,
+            "matched_text": self.matched_text,
+            "confidence": round(self.confidence, 3),
+            "coverage": round(self.coverage, 3),
+            "margin": round(self.margin, 3),
+            "candidates": [asdict(c) for c in self.candidates],
+        }
+
+
+class CustomerNameIndex:
+    """
+    In-memory trigram inverted index over account names.
+
+    Lookup: only the rarest trigrams of the query are counted (prefix
+    filtering, see search()), the best
+    candidates by shared-trigram count are then re-scored exactly with the
+    Dice coefficient. Cost depends on posting-list sizes of the query's
+    rare trigrams, not on the number of accounts.
+
+    Accounts are upserted/removed one at a time, so the index follows data
+    changes without a rebuild.
+    """
+
+    def __init__(self, min_score: float = 0.5, rerank: int = 32, max_probe: int = 6):
+        self.min_score = min_score
+        self.rerank = rerank
+        self.max_probe = max_probe
+        self._lock = threading.RLock()
+        self._slot_by_id: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._names: List[Optional[str]] = []
+        self._grams: List[Set[str]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._arrays: Dict[str, "np.ndarray"] = {}   # frozen copies of postings for counting
+        self._exact: Dict[str, Set[int]] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def upsert(self, account_id: str, customer_name: str) -> None:
+        with self._lock:
+            slot = self._slot_by_id.get(account_id)
+            if slot is not None:
+                if self._names[slot] == customer_name:
+                    return
+                self._unlink(slot)
+            elif self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._ids)
+                self._ids.append(None)
+                self._names.append(None)
+                self._grams.append(set())
+
+            norm = normalize_name(customer_name)
+            grams = _trigrams(norm)
+            self._slot_by_id[account_id] = slot
+            self._ids[slot] = account_id
+            self._names[slot] = customer_name
+            self._grams[slot] = grams
+            for g in grams:
+                self._postings.setdefault(g, set()).add(slot)
+                self._arrays.pop(g, None)
+            self._exact.setdefault(norm, set()).add(slot)
+
+    def remove(self, account_id: str) -> None:
+        with self._lock:
+            slot = self._slot_by_id.pop(account_id, None)
+            if slot is None:
+                return
+            self._unlink(slot)
+            self._ids[slot] = None
+            self._names[slot] = None
+            self._grams[slot] = set()
+            self._free.append(slot)
+
+    def _unlink(self, slot: int) -> None:
+        for g in self._grams[slot]:
+            self._arrays.pop(g, None)
+            posting = self._postings.get(g)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self._postings[g]
+        norm = normalize_name(self._names[slot] or "")
+        exact = self._exact.get(norm)
+        if exact is not None:
+            exact.discard(slot)
+            if not exact:
+                del self._exact[norm]
+
+    def _posting_array(self, gram: str) -> "np.ndarray":
+        arr = self._arrays.get(gram)
+        if arr is None:
+            arr = np.fromiter(self._postings[gram], dtype=np.int64)
+            self._arrays[gram] = arr
+        return arr
+
+    def sync(self, rows: Iterable[Tuple[str, str]]) -> Tuple[int, int]:
+        """
+        Makes the index match `rows` of (account_id, customer_name).
+        Only changed/new/removed accounts touch the index.
+        Returns (upserted, removed).
+        """
+        with self._lock:
+            seen: Set[str] = set()
+            upserted = 0
+            for account_id, name in rows:
+                seen.add(account_id)
+                slot = self._slot_by_id.get(account_id)
+                if slot is None or self._names[slot] != name:
+                    self.upsert(account_id, name)
+                    upserted += 1
+            gone = [a for a in self._slot_by_id if a not in seen]
+            for account_id in gone:
+                self.remove(account_id)
+            return upserted, len(gone)
+
+    def search(self, query: str, limit: int = 5) -> List[NameCandidate]:
+        norm = normalize_name(query)
+        if not norm:
+            return []
+        q = _trigrams(norm)
+
+        with self._lock:
+            exact = self._exact.get(norm)
+            if exact:
+                hits = [NameCandidate(self._ids[s], self._names[s], 1.0) for s in exact]  # type: ignore[arg-type]
+                if len(hits) >= limit:
+                    return hits[:limit]
+            else:
+                hits = []
+
+            # Prefix filter: any name scoring >= min_score shares at least
+            # `need` trigrams with the query, so it must contain one of the
+            # (len(q) - need + 1) rarest query trigrams. Only those are counted,
+            # capped at `max_probe` to bound latency on long queries (a close
+            # match contains nearly all query trigrams, so recall holds).
+            grams = sorted((g for g in q if g in self._postings), key=lambda g: len(self._postings[g]))
+            if not grams:
+                return hits
+            need = max(1, math.ceil(self.min_score * len(q) / (2 - self.min_score)))
+            probe = grams[: min(self.max_probe, max(1, len(grams) - need + 1))]
+
+            slots = np.concatenate([self._posting_array(g) for g in probe])
+            uniq, counts = np.unique(slots, return_counts=True)
+            if len(uniq) > self.rerank:
+                top = np.argpartition(counts, -self.rerank)[-self.rerank :]
+                uniq = uniq[top]
+
+            exact_slots = exact or set()
+            for slot in uniq.tolist():
+                if slot in exact_slots:
+                    continue
+                cand = self._grams[slot]
+                score = 2 * len(q & cand) / (len(q) + len(cand))
+                if score >= self.min_score:
+                    hits.append(NameCandidate(self._ids[slot], self._names[slot], round(score, 4)))  # type: ignore[arg-type]
+
+        hits.sort(key=lambda c: c.score, reverse=True)
+        return hits[:limit]
+
+    def resolve(self, phrase: str, limit: int = 5) -> NameResolution:
+        """
+        Resolves free text that starts with a customer name, e.g. "Acme Corp"
+        -> Acme. Leading token spans are tried from longest to shortest.
+
+        A span's confidence is its match score scaled by how much of the
+        phrase it covers; trailing filler ("Inc", "Ltd", ...) is not counted
+        against it. So "Acme Holdings Group" does not resolve to Acme just
+        because it starts with it.
+        """
+        tokens = phrase.split()[:_MAX_PHRASE_TOKENS]
+        best = NameResolution(query=phrase, matched_text=phrase)
+        for n in range(len(tokens), 0, -1):
+            span = " ".join(tokens[:n])
+            unmatched = sum(
+                1 for t in tokens[n:] if (nt := normalize_name(t)) and nt not in _FILLER_TOKENS
+            )
+            candidates = self.search(span, limit=limit)
+            if not candidates:
+                continue
+            res = NameResolution(query=phrase, matched_text=span, candidates=candidates, coverage=n / (n + unmatched))
+            if res.confidence > best.confidence:
+                best = res
+                if best.confidence >= 1.0:
+                    break
+        return best
+
+
+_index: Optional[CustomerNameIndex] = None
+_index_lock = threading.Lock()
+# sharded mode: store version the index was last read from the shards at
+_index_version: Optional[int] = None
+
+_ACCOUNTS_SQL = "SELECT account_id, customer_name FROM accounts"
+
+
+def _apply_account_changes(version: int, changes: Dict[str, "pd.DataFrame"]) -> None:
+    # ingests only upsert, so changed accounts are upserted; O(changed rows)
+    accounts = changes.get("accounts")
+    if accounts is None or accounts.empty:
+        return
+    with _index_lock:
+        if _index is None:
+            return  # not built yet; the build reads committed data
+        for account_id, name in zip(accounts["account_id"], accounts["customer_name"]):
+            _index.upsert(account_id, name)
+
+
+def get_index() -> CustomerNameIndex:
+    """
+    Process-wide index over the `accounts` table. Built once (on first use,
+    or by duckdb_store.preload()); after that each ingest upserts only the
+    account rows it changed.
+    """
+    global _index, _index_version
+    with _index_lock:
+        if _index is None:
+            index = CustomerNameIndex()
+            # subscribe before reading, so an ingest committing during the
+            # build is applied (idempotently) right after it
+            on_data_change(_apply_account_changes)
+            store = _sharded_store()
+            if store is not None:
+                _index_version = store.version  # before the read; see _resync_if_moved
+            # latest committed data, not the caller's pinned snapshot;
+            # gathered from every shard when sharded
+            index.sync(query_all(_ACCOUNTS_SQL, latest=True))
+            _index = index
+        return _index
+
+
+def _resync_if_moved(index: CustomerNameIndex) -> None:
+    """
+    Shared shard servers take ingests from other workers too, and those are
+    never notified here. A workflow pinned at a store version other than the
+    one the index was read at re-syncs it from the shards (only changed
+    accounts touch the index).
+    """
+    global _index_version
+    version = pinned_version()
+    if version is None or version == _index_version or _sharded_store() is None:
+        return
+    with _index_lock:
+        if version != _index_version:
+            index.sync(query_all(_ACCOUNTS_SQL, latest=True))
+            _index_version = version
+
+
+def resolve_customer_name(phrase: str, limit: int = 5) -> NameResolution:
+    index = get_index()
+    _resync_if_moved(index)
+    return index.resolve(phrase, limit=limit)
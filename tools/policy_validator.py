@@ -1,8 +1,72 @@
 # tools/policy_validator.py
 from __future__ import annotations
 
+import operator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
 from pydantic import BaseModel, Field
 
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(frozen=True)
+class PolicyRule:
+    """
+    One row of a policy rule table.
+    A rule fires when `column <op> threshold`. Firing rules always require
+    director approval; `is_violation` rules are also reported as violations.
+    """
+    code: str
+    column: str              # "discount_pct" | "computed_arr_usd"
+    op: str                  # ">" | ">="
+    threshold: float
+    is_violation: bool = True
+
+
+# Versioned, table-driven rule sets. Finance changes thresholds by adding a
+# new version here rather than editing the checks themselves.
+POLICY_RULESETS: Dict[str, List[PolicyRule]] = {
+    "v1": [
+        PolicyRule(code="DISCOUNT_EXCEEDS_CAP", column="discount_pct", op=">", threshold=20),
+        PolicyRule(
+            code="ARR_ABOVE_AUTO_APPROVE",
+            column="computed_arr_usd",
+            op=">=",
+            threshold=200_000,
+            is_violation=False,
+        ),
+    ],
+}
+
+DEFAULT_POLICY_VERSION = "v1"
+
+# NumPy ufunc names; numpy itself is imported only by the bulk path
+_OPS = {
+    ">": "greater",
+    ">=": "greater_equal",
+}
+
+_SCALAR_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def get_ruleset(policy_version: str = DEFAULT_POLICY_VERSION) -> List[PolicyRule]:
+    try:
+        return POLICY_RULESETS[policy_version]
+    except KeyError:
+        raise ValueError(f"Unknown policy version: {policy_version}") from None
+
+
+def _threshold(rules: List[PolicyRule], code: str) -> int:
+    for r in rules:
+        if r.code == code:
+            return int(r.threshold)
+    raise ValueError(f"Rule set has no {code} rule")
+
 
 class PolicyResult(BaseModel):
     policy_version: str = "v1"
@@ -12,15 +76,86 @@ class PolicyResult(BaseModel):
     violations: list[str] = Field(default_factory=list)
 
 
-def validate_deal_policy(discount_pct: int, computed_arr_usd: int) -> PolicyResult:
-    violations: list[str] = []
+@dataclass
+class PortfolioPolicyResult:
+    """
+    Column-oriented result of a bulk policy run.
+    Bit i of `rule_mask` is set when rule i of the rule set fired (see
+    `rule_codes`); `violation_mask` keeps only the bits of `is_violation`
+    rules, matching PolicyResult.violations.
+    """
+    policy_version: str
+    rule_codes: List[str]
+    rule_mask: np.ndarray                    # uint32, one per deal
+    violation_mask: np.ndarray               # uint32, one per deal
+    requires_director_approval: np.ndarray   # bool, one per deal
+
+    def _codes(self, mask: int) -> List[str]:
+        return [code for i, code in enumerate(self.rule_codes) if mask & (1 << i)]
+
+    def decode(self, row: int) -> List[str]:
+        """Names of the rules that fired for a single row."""
+        return self._codes(int(self.rule_mask[row]))
+
+    def violations(self, row: int) -> List[str]:
+        """Names of the violations for a single row (as in PolicyResult)."""
+        return self._codes(int(self.violation_mask[row]))
+
+
+def validate_portfolio_policy(
+    discount_pct: Sequence[float] | np.ndarray,
+    computed_arr_usd: Sequence[float] | np.ndarray,
+    policy_version: str = DEFAULT_POLICY_VERSION,
+) -> PortfolioPolicyResult:
+    """
+    Evaluate a whole portfolio of deals in one vectorized pass.
+    Inputs are equal-length columns (lists, NumPy arrays or pandas Series).
+    """
+    import numpy as np
+
+    rules = get_ruleset(policy_version)
+    if len(rules) > 32:
+        raise ValueError("Rule sets are limited to 32 rules (uint32 bitmask)")
+
+    columns = {
+        "discount_pct": np.asarray(discount_pct, dtype=np.float64),
+        "computed_arr_usd": np.asarray(computed_arr_usd, dtype=np.float64),
+    }
+    n = len(columns["discount_pct"])
+    if len(columns["computed_arr_usd"]) != n:
+        raise ValueError("discount_pct and computed_arr_usd must have the same length")
+
+    mask = np.zeros(n, dtype=np.uint32)
+    violation_bits = 0
+    for i, rule in enumerate(rules):
+        fired = getattr(np, _OPS[rule.op])(columns[rule.column], rule.threshold)
+        mask |= fired.astype(np.uint32) << np.uint32(i)
+        if rule.is_violation:
+            violation_bits |= 1 << i
+
+    return PortfolioPolicyResult(
+        policy_version=policy_version,
+        rule_codes=[r.code for r in rules],
+        rule_mask=mask,
+        violation_mask=mask & np.uint32(violation_bits),
+        requires_director_approval=mask != 0,
+    )
 
-    if discount_pct > 20:
-        violations.append("DISCOUNT_EXCEEDS_CAP")
 
-    requires = computed_arr_usd >= 200_000 or len(violations) > 0
+def validate_deal_policy(
+    discount_pct: int,
+    computed_arr_usd: int,
+    policy_version: str = DEFAULT_POLICY_VERSION,
+) -> PolicyResult:
+    # Same rule table as the bulk path, evaluated on scalars.
+    rules = get_ruleset(policy_version)
+    values = {"discount_pct": discount_pct, "computed_arr_usd": computed_arr_usd}
+    fired = [r for r in rules if _SCALAR_OPS[r.op](values[r.column], r.threshold)]
 
     return PolicyResult(
-        requires_director_approval=requires,
-        violations=violations,
+        policy_version=policy_version,
+        discount_cap_pct=_threshold(rules, "DISCOUNT_EXCEEDS_CAP"),
+        max_auto_approve_arr_usd=_threshold(rules, "ARR_ABOVE_AUTO_APPROVE"),
+        requires_director_approval=len(fired) > 0,
+        violations=[r.code for r in fired if r.is_violation],
     )
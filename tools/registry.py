@@ -0,0 +1,40 @@
+# tools/registry.py
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+# Tool name -> module that registers it. Modules are imported on first use,
+# so plans can reference tools without paying for duckdb/pydantic up front.
+_TOOL_MODULES: Dict[str, str] = {
+    "crm.account_with_latest_opportunity": "tools.crm_reader",
+    "billing.profile": "tools.billing_reader",
+    "analytics.usage_summary_3mo": "tools.data_query",
+}
+
+_TOOLS: Dict[str, "ToolSpec"] = {}
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    fn: Callable[..., Any]
+    description: str = ""
+
+
+def register_tool(name: str, description: str = "") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator: makes a tool function callable from TOOL plan steps."""
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        _TOOLS[name] = ToolSpec(name=name, fn=fn, description=description)
+        return fn
+    return decorator
+
+
+def get_tool(name: str) -> ToolSpec:
+    if name not in _TOOLS and name in _TOOL_MODULES:
+        importlib.import_module(_TOOL_MODULES[name])
+    try:
+        return _TOOLS[name]
+    except KeyError:
+        raise KeyError(f"Unknown tool: {name}") from None
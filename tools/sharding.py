@@ -0,0 +1,527 @@
+# tools/sharding.py
+"""
+Sharded analytics store: customers are hash-partitioned across N shard
+servers, each owning its own DuckDB database (in memory, or a file so a
+restarted shard keeps its data).
+
+Shared shards (several worker processes, one copy of the data):
+
+    python -m tools.sharding serve --shard-id 0 --num-shards 2 --port 7400 --path .shards/0.duckdb
+    python -m tools.sharding serve --shard-id 1 --num-shards 2 --port 7401 --path .shards/1.duckdb
+    # in every worker (ANALYTICS_SHARD_AUTHKEY must match the servers'):
+    configure_sharding(addresses=["127.0.0.1:7400", "127.0.0.1:7401"])   # or ANALYTICS_SHARD_ADDRESSES
+
+Private shards (one process, e.g. tests or the Streamlit app):
+
+    configure_sharding(4)                          # or ANALYTICS_SHARDS=4
+    configure_sharding(4, data_dir=".shards")      # or ANALYTICS_SHARD_DIR=.shards
+
+Tool readers go through duckdb_store.query_customer / query_all, which route
+to the owning shard or scatter to all shards and gather the rows. Ingest
+(tools/ingest.py) splits each change set by owning shard.
+
+A customer's rows live on one shard: accounts, subscriptions and
+usage_metrics by customer_name; opportunities follow their account.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_store: Optional["ShardedStore"] = None
+_store_lock = threading.Lock()
+_env_checked = False
+
+
+class ShardError(RuntimeError):
+    """A shard failed to open, execute a request or stay connected."""
+    pass
+
+
+class ShardRequestError(ShardError):
+    """A reachable shard rejected a request (bad SQL or change set)."""
+    pass
+
+
+def shard_for(customer_name: str, num_shards: int) -> int:
+    """Owning shard of a customer (stable across processes and restarts)."""
+    return zlib.crc32(customer_name.lower().encode("utf-8")) % num_shards
+
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _authkey_from_env() -> Optional[bytes]:
+    key = os.environ.get("ANALYTICS_SHARD_AUTHKEY")
+    return key.encode("utf-8") if key else None
+
+
+# columns a change set needs before it can be split by owning shard
+_ROUTING_COLUMNS: Dict[str, List[str]] = {
+    "accounts": ["account_id", "customer_name"],
+    "opportunities": ["account_id"],
+}
+
+
+# ---- shard server ----
+
+def _open_shard(shard_id: int, num_shards: int, path: Optional[str]):
+    """Opens the shard database, seeding its partition of the data on first open."""
+    import duckdb
+    import pandas as pd
+
+    from data.mock_data import ACCOUNTS, OPPORTUNITIES, SUBSCRIPTIONS, USAGE_METRICS
+    from tools.duckdb_store import _create_tables
+
+    con = duckdb.connect(database=path or ":memory:")
+    exists = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_name = '_store_meta'"
+    ).fetchone()[0]
+    if exists:
+        return con
+
+    def owned(df: "pd.DataFrame") -> "pd.DataFrame":
+        # filtering (rather than building from the owned rows) keeps the
+        # schema even when a shard owns no rows of a table
+        return df[[shard_for(name, num_shards) == shard_id for name in df["customer_name"]]]
+
+    accounts = owned(pd.DataFrame(ACCOUNTS))
+    opportunities = pd.DataFrame(OPPORTUNITIES)
+    _create_tables(
+        con,
+        {
+            "accounts": accounts,
+            "opportunities": opportunities[opportunities["account_id"].isin(set(accounts["account_id"]))],
+            "subscriptions": owned(pd.DataFrame(SUBSCRIPTIONS)),
+            "usage_metrics": owned(pd.DataFrame(USAGE_METRICS)),
+        },
+    )
+    return con
+
+
+def _apply_local(con, changes: Dict[str, "pd.DataFrame"]) -> int:
+    from tools.ingest import _upsert
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        for table, df in changes.items():
+            _upsert(con, table, df)
+        con.execute("UPDATE _store_meta SET version = version + 1")
+        version = int(con.execute("SELECT version FROM _store_meta").fetchone()[0])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return version
+
+
+def _serve_connection(conn, db, shard_id: int, num_shards: int, write_lock: threading.Lock) -> None:
+    """One coordinator connection: requests are answered in order on a private cursor."""
+    cur = db.cursor()
+    try:
+        while True:
+            try:
+                op, *args = conn.recv()
+            except (EOFError, OSError):
+                return
+            if op == "close":
+                return
+            try:
+                if op == "hello":
+                    # coordinators must agree on the partitioning
+                    if tuple(args) != (shard_id, num_shards):
+                        raise ValueError(f"this is shard {shard_id} of {num_shards}, not {args[0]} of {args[1]}")
+                    value = None
+                elif op == "query":
+                    sql, params = args
+                    value = cur.execute(sql, params or []).fetchall()
+                elif op == "version":
+                    value = int(cur.execute("SELECT version FROM _store_meta").fetchone()[0])
+                elif op == "apply":
+                    with write_lock:  # one writer per shard, whichever coordinator sends it
+                        value = _apply_local(cur, args[0])
+                else:
+                    raise ValueError(f"Unknown shard op: {op}")
+                conn.send(("ok", value))
+            except Exception as e:
+                conn.send(("err", f"{type(e).__name__}: {e}"))
+    finally:
+        cur.close()
+        conn.close()
+
+
+def serve_shard(
+    shard_id: int,
+    num_shards: int,
+    path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    authkey: Optional[bytes] = None,
+    ready: Any = None,
+) -> None:
+    """
+    Runs one shard server until the process is stopped. Every connecting
+    coordinator (one per worker process) gets its own thread and cursor, so
+    all workers share this shard's single copy of the data.
+
+    `ready` (a Connection) receives ("ok", address) once listening, or
+    ("err", message) if the database cannot be opened.
+    """
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Listener
+
+    db = None
+    try:
+        db = _open_shard(shard_id, num_shards, path)
+        listener = Listener((host, port), authkey=authkey)
+    except Exception as e:
+        if db is None:
+            msg = f"cannot open shard {shard_id} ({path or ':memory:'}): {type(e).__name__}: {e}"
+        else:
+            db.close()
+            msg = f"cannot listen for shard {shard_id} on {host}:{port}: {type(e).__name__}: {e}"
+        if ready is None:
+            raise ShardError(msg) from e
+        ready.send(("err", msg))
+        return
+    if ready is not None:
+        ready.send(("ok", listener.address))
+        ready.close()
+
+    write_lock = threading.Lock()
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue  # failed handshake (e.g. wrong authkey); keep serving
+            threading.Thread(
+                target=_serve_connection,
+                args=(conn, db, shard_id, num_shards, write_lock),
+                name=f"shard-{shard_id}-conn",
+                daemon=True,
+            ).start()
+    finally:
+        listener.close()
+        db.close()
+
+
+# ---- coordinator (in each worker process) ----
+
+@dataclass
+class _Shard:
+    shard_id: int
+    address: Tuple[str, int]
+    conn: Any
+    lock: threading.Lock
+    process: Any = None      # set when this coordinator spawned the shard itself
+
+
+class ShardedStore:
+    """
+    Client side of the shard servers. One in-flight request per shard per
+    coordinator (guarded by a lock), so N shards serve up to N queries of a
+    worker in parallel.
+
+    Pass `addresses` (ordered by shard id) to attach to running shard
+    servers; otherwise `num_shards` private shard processes are spawned.
+    """
+
+    def __init__(
+        self,
+        num_shards: Optional[int] = None,
+        data_dir: Optional[str] = None,
+        addresses: Optional[Sequence[str]] = None,
+        authkey: Optional[bytes] = None,
+    ):
+        from multiprocessing import AuthenticationError
+        from multiprocessing.connection import Client
+
+        self._shards: List[_Shard] = []
+        try:
+            if addresses:
+                self.num_shards = len(addresses)
+                authkey = authkey or _authkey_from_env()
+                targets = [(_parse_address(a), None) for a in addresses]
+            else:
+                if not num_shards or num_shards < 1:
+                    raise ValueError("num_shards must be >= 1")
+                self.num_shards = num_shards
+                authkey = authkey or _authkey_from_env() or os.urandom(16)
+                targets = self._spawn(data_dir, authkey)
+
+            for shard_id, (address, proc) in enumerate(targets):
+                try:
+                    conn = Client(address, authkey=authkey)
+                except (OSError, EOFError, AuthenticationError) as e:
+                    raise ShardError(f"cannot connect to shard {shard_id} at {address}: {type(e).__name__}: {e}") from e
+                shard = _Shard(shard_id, address, conn, threading.Lock(), proc)
+                self._shards.append(shard)
+                self._request(shard, "hello", shard_id, self.num_shards)
+        except BaseException:
+            self.close()
+            raise
+
+    def _spawn(self, data_dir: Optional[str], authkey: bytes) -> List[Tuple[Tuple[str, int], Any]]:
+        import multiprocessing as mp
+
+        # spawn, not fork: the parent is multi-threaded (service workers, pools)
+        ctx = mp.get_context("spawn")
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        started = []
+        for i in range(self.num_shards):
+            parent, child = ctx.Pipe(duplex=False)
+            path = os.path.join(data_dir, f"shard-{i}-of-{self.num_shards}.duckdb") if data_dir else None
+            proc = ctx.Process(
+                target=serve_shard,
+                args=(i, self.num_shards, path),
+                kwargs={"authkey": authkey, "ready": child},
+                name=f"analytics-shard-{i}",
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            started.append((proc, parent, path))
+
+        targets, errors = [], []
+        for proc, ready, path in started:
+            try:
+                status, value = ready.recv()
+            except EOFError:
+                status, value = "err", f"shard process for {path or ':memory:'} exited during startup"
+            if status == "ok":
+                targets.append((value, proc))
+            else:
+                errors.append(value)
+                proc.join(timeout=5)
+        if errors:
+            for address, proc in targets:
+                proc.terminate()
+            hint = ""
+            if data_dir:
+                hint = (
+                    " (files in a shard dir can be opened by one process only; to share shards between"
+                    " workers run `python -m tools.sharding serve` and connect with addresses)"
+                )
+            raise ShardError("; ".join(errors) + hint)
+        return targets
+
+    def shard_of(self, customer_name: str) -> int:
+        return shard_for(customer_name, self.num_shards)
+
+    def _request(self, shard: _Shard, *msg: Any) -> Any:
+        try:
+            with shard.lock:
+                shard.conn.send(msg)
+                status, value = shard.conn.recv()
+        except (EOFError, OSError) as e:
+            raise ShardError(f"shard {shard.shard_id} at {shard.address} is unreachable: {type(e).__name__}") from e
+        if status != "ok":
+            raise ShardRequestError(f"shard {shard.shard_id}: {value}")
+        return value
+
+    def _broadcast(self, targets: Dict[int, Tuple[Any, ...]]) -> Dict[int, Any]:
+        # send to every target shard first, then gather: shards execute in
+        # parallel. Locks are taken in shard order so concurrent broadcasts
+        # cannot deadlock.
+        shards = [s for s in self._shards if s.shard_id in targets]
+        for shard in shards:
+            shard.lock.acquire()
+        replies: Dict[int, Tuple[str, Any]] = {}
+        try:
+            sent = []
+            for shard in shards:
+                try:
+                    shard.conn.send(targets[shard.shard_id])
+                    sent.append(shard)
+                except OSError as e:
+                    replies[shard.shard_id] = ("down", f"unreachable: {type(e).__name__}")
+            for shard in sent:
+                try:
+                    replies[shard.shard_id] = shard.conn.recv()
+                except (EOFError, OSError) as e:
+                    replies[shard.shard_id] = ("down", f"unreachable: {type(e).__name__}")
+        finally:
+            for shard in shards:
+                shard.lock.release()
+        errors = [f"shard {i}: {value}" for i, (status, value) in sorted(replies.items()) if status != "ok"]
+        if any(status == "down" for status, _ in replies.values()):
+            raise ShardError("; ".join(errors))
+        if errors:
+            raise ShardRequestError("; ".join(errors))
+        return {i: value for i, (_, value) in replies.items()}
+
+    def query(self, customer_name: str, sql: str, params: Optional[list] = None) -> List[tuple]:
+        """Runs `sql` on the shard that owns `customer_name`."""
+        return self._request(self._shards[self.shard_of(customer_name)], "query", sql, params)
+
+    def _scatter_by_shard(self, sql: str, params: Optional[list]) -> Dict[int, List[tuple]]:
+        return self._broadcast({s.shard_id: ("query", sql, params) for s in self._shards})
+
+    def scatter(self, sql: str, params: Optional[list] = None) -> List[tuple]:
+        """Runs `sql` on every shard and concatenates the rows (shard order)."""
+        by_shard = self._scatter_by_shard(sql, params)
+        return [row for i in sorted(by_shard) for row in by_shard[i]]
+
+    @property
+    def version(self) -> int:
+        """
+        Store-wide data version: the sum of the shard versions. Every ingest
+        bumps at least one shard, and all coordinators see the same value.
+        """
+        return sum(self._broadcast({s.shard_id: ("version",) for s in self._shards}).values())
+
+    def _account_owners(self, account_ids: List[str]) -> Dict[str, int]:
+        """Shard currently holding each of `account_ids` (absent if unknown)."""
+        if not account_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in account_ids)
+        by_shard = self._scatter_by_shard(
+            f"SELECT account_id FROM accounts WHERE account_id IN ({placeholders})", list(account_ids)
+        )
+        return {account_id: i for i, rows in by_shard.items() for (account_id,) in rows}
+
+    def _split(self, changes: Dict[str, "pd.DataFrame"]) -> Dict[int, Dict[str, "pd.DataFrame"]]:
+        """Change sets per owning shard."""
+        for table, df in changes.items():
+            missing = [c for c in _ROUTING_COLUMNS.get(table, ["customer_name"]) if c not in df.columns]
+            if missing:
+                raise ValueError(f"Change set for {table} is missing columns: {missing}")
+        accounts = changes.get("accounts")
+        opportunities = changes.get("opportunities")
+        referenced = set()
+        if accounts is not None:
+            referenced.update(accounts["account_id"])
+        if opportunities is not None:
+            referenced.update(opportunities["account_id"])
+        # looked up on the shards, so ingests from other workers are seen
+        owners_now = self._account_owners(sorted(referenced))
+
+        new_accounts: Dict[str, int] = {}
+        if accounts is not None:
+            for account_id, customer_name in zip(accounts["account_id"], accounts["customer_name"]):
+                target = self.shard_of(customer_name)
+                current = owners_now.get(account_id)
+                if current is not None and current != target:
+                    raise ValueError(
+                        f"Account {account_id} would move from shard {current} to {target}; "
+                        "renaming a customer across shards is not supported"
+                    )
+                new_accounts[account_id] = target
+
+        per_shard: Dict[int, Dict[str, "pd.DataFrame"]] = {}
+        for table, df in changes.items():
+            if df.empty:
+                continue
+            if table == "opportunities":
+                owners = []
+                for account_id in df["account_id"]:
+                    shard_id = new_accounts.get(account_id, owners_now.get(account_id))
+                    if shard_id is None:
+                        raise ValueError(f"Opportunity references unknown account: {account_id}")
+                    owners.append(shard_id)
+            else:
+                owners = [self.shard_of(name) for name in df["customer_name"]]
+            for shard_id in sorted(set(owners)):
+                per_shard.setdefault(shard_id, {})[table] = df[[o == shard_id for o in owners]]
+        return per_shard
+
+    def apply_changes(self, changes: Dict[str, "pd.DataFrame"]) -> int:
+        """
+        Upserts change sets on the owning shards and returns the new store
+        version. Each shard commits its part in one transaction; the shards
+        commit independently, so a reader may briefly see one shard's part
+        before another's.
+        """
+        per_shard = self._split(changes)
+        if per_shard:
+            self._broadcast({i: ("apply", part) for i, part in per_shard.items()})
+        return self.version
+
+    def close(self) -> None:
+        for shard in self._shards:
+            try:
+                with shard.lock:
+                    shard.conn.send(("close",))
+                    shard.conn.close()
+            except OSError:
+                pass
+        for shard in self._shards:
+            if shard.process is not None:
+                shard.process.terminate()
+                shard.process.join(timeout=5)
+        self._shards = []
+
+
+def configure_sharding(
+    num_shards: Optional[int] = None,
+    data_dir: Optional[str] = None,
+    addresses: Optional[Sequence[str]] = None,
+    authkey: Optional[bytes] = None,
+) -> "ShardedStore":
+    """
+    Switches this process to the sharded store: attaches to running shard
+    servers at `addresses`, or spawns `num_shards` private ones. Call
+    before the first query.
+    """
+    global _store, _env_checked
+    with _store_lock:
+        if _store is not None:
+            raise RuntimeError("Sharding is already configured")
+        _store = ShardedStore(num_shards, data_dir=data_dir, addresses=addresses, authkey=authkey)
+        _env_checked = True
+        atexit.register(_store.close)
+        return _store
+
+
+def get_sharded_store() -> Optional["ShardedStore"]:
+    """The configured ShardedStore, or None in single-process mode."""
+    global _store, _env_checked
+    if _env_checked:
+        return _store
+    with _store_lock:
+        if not _env_checked:
+            addresses = [a for a in os.environ.get("ANALYTICS_SHARD_ADDRESSES", "").split(",") if a.strip()]
+            num_shards = int(os.environ.get("ANALYTICS_SHARDS", "0") or 0)
+            if addresses or num_shards > 0:
+                _store = ShardedStore(
+                    num_shards, data_dir=os.environ.get("ANALYTICS_SHARD_DIR"), addresses=addresses or None
+                )
+                atexit.register(_store.close)
+            _env_checked = True
+    return _store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analytics store shard server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="serve one shard to any number of worker processes")
+    p.add_argument("--shard-id", type=int, required=True)
+    p.add_argument("--num-shards", type=int, required=True)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, required=True)
+    p.add_argument("--path", help="DuckDB file for this shard (default: in memory)")
+    args = parser.parse_args()
+
+    authkey = _authkey_from_env()
+    if authkey is None:
+        parser.error("set ANALYTICS_SHARD_AUTHKEY (shared with the workers) before serving")
+    if args.path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+    print(f"Serving shard {args.shard_id} of {args.num_shards} on {args.host}:{args.port}")
+    serve_shard(args.shard_id, args.num_shards, args.path, host=args.host, port=args.port, authkey=authkey)
+
+
+if __name__ == "__main__":
+    main()